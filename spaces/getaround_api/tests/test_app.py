@@ -0,0 +1,234 @@
+import sys
+from collections import OrderedDict
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("mlflow")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import app  # noqa: E402
+
+ROW = {
+    "mileage": 45000,
+    "engine_power": 120,
+    "model_key": "renault",
+    "fuel_grouped": "diesel",
+    "paint_color": "grey",
+    "car_type": "sedan",
+    "private_parking_available": True,
+    "has_gps": True,
+    "has_air_conditioning": True,
+    "automatic_car": False,
+    "has_getaround_connect": True,
+    "has_speed_regulator": True,
+    "winter_tires": False
+}
+
+
+@pytest.mark.parametrize("value, expected", [(1.0, True), (0.0, False)])
+def test_as_bool_accepts_whole_floats(value, expected):
+    assert app._as_bool(value) is expected
+
+
+@pytest.mark.parametrize("value", [0.5, 2.0, float("nan")])
+def test_as_bool_rejects_other_floats(value):
+    with pytest.raises(ValueError):
+        app._as_bool(value)
+
+
+def test_predict_rows_accepts_float_booleans():
+    client = TestClient(app.app)
+    row = dict(ROW, has_gps=1.0, winter_tires=0.0)
+    resp = client.post("/predict", json={"rows": [row]})
+    assert resp.status_code == 200
+    assert resp.json()["prediction"] == client.post(
+        "/predict", json={"rows": [ROW]}
+    ).json()["prediction"]
+
+
+def test_root_exposes_model_ids():
+    client = TestClient(app.app)
+    data = client.get("/").json()
+    assert data["model_uuid"] == "514add3140a2447bb144ef25fdd35803"
+    assert data["run_id"] == "c525ab61c63348f48171b68ee556b6b5"
+
+
+@pytest.mark.parametrize("value", [" true ", "yes\n", " 0"])
+def test_as_bool_rejects_padded_strings(value):
+    with pytest.raises(ValueError):
+        app._as_bool(value)
+
+
+def _detail(resp):
+    assert resp.status_code == 422
+    return resp.json()["detail"]
+
+
+def test_rows_missing_field_detail():
+    row = {k: v for k, v in ROW.items() if k != "mileage"}
+    resp = TestClient(app.app).post("/predict", json={"rows": [row]})
+    assert _detail(resp) == [
+        {"loc": ["body", "rows", 0, "mileage"], "msg": "Field required", "type": "missing"}
+    ]
+
+
+def test_rows_wrong_type_detail():
+    row = dict(ROW, engine_power="fast", has_gps="maybe")
+    resp = TestClient(app.app).post("/predict", json={"rows": [row]})
+    assert _detail(resp) == [
+        {
+            "loc": ["body", "rows", 0, "engine_power"],
+            "msg": "Input should be a valid number",
+            "type": "value_error"
+        },
+        {
+            "loc": ["body", "rows", 0, "has_gps"],
+            "msg": "Input should be a valid boolean",
+            "type": "value_error"
+        }
+    ]
+
+
+def test_rows_strict_category_detail():
+    row = dict(ROW, paint_color="pink")
+    resp = TestClient(app.app).post("/predict", json={"rows": [ROW, row]})
+    assert _detail(resp) == [
+        {
+            "loc": ["body", "rows", 1, "paint_color"],
+            "msg": app._PAINT_MSG,
+            "type": "value_error"
+        }
+    ]
+
+
+@pytest.mark.parametrize("rows", [ROW, "rows", 3])
+def test_rows_must_be_a_list(rows):
+    resp = TestClient(app.app).post("/predict", json={"rows": rows})
+    assert _detail(resp) == [
+        {"loc": ["body", "rows"], "msg": "Input should be a valid list", "type": "value_error"}
+    ]
+
+
+def test_invalid_json_body():
+    resp = TestClient(app.app).post(
+        "/predict", content=b'{"rows": [', headers={"Content-Type": "application/json"}
+    )
+    [error] = _detail(resp)
+    assert error["loc"] == ["body"]
+    assert error["type"] == "json_invalid"
+
+
+def test_legacy_input_matches_rows():
+    client = TestClient(app.app)
+    matrix = [[ROW[c] for c in app.FEATURES]] * 2
+    resp = client.post("/predict", json={"input": matrix})
+    assert resp.status_code == 200
+    expected = client.post("/predict", json={"rows": [ROW]}).json()["prediction"]
+    assert resp.json()["prediction"] == pytest.approx(expected * 2)
+
+
+def test_legacy_input_wrong_row_length():
+    matrix = [[ROW[c] for c in app.FEATURES], [ROW[c] for c in app.FEATURES][:-1]]
+    resp = TestClient(app.app).post("/predict", json={"input": matrix})
+    assert resp.status_code == 400
+    assert resp.json()["detail"].startswith("Lignes [1] n'ont pas")
+
+
+@pytest.mark.parametrize("n_rows", [1, 2])
+def test_legacy_input_nested_values(n_rows):
+    # Right row lengths but list cells: numpy builds a 3-D matrix
+    matrix = [[[1, 2]] * len(app.FEATURES)] * n_rows
+    resp = TestClient(app.app).post("/predict", json={"input": matrix})
+    assert resp.status_code == 400
+    assert resp.json()["detail"].startswith(
+        f"Lignes {list(range(n_rows))} contiennent des listes au lieu de valeurs"
+    )
+
+
+def test_rows_validators_cover_features():
+    assert app._ROWS_MISSING_FEATURES == []
+
+
+def test_missing_row_validator_only_rejects_rows(monkeypatch):
+    monkeypatch.setattr(app, "_ROWS_MISSING_FEATURES", ["winter_tires"])
+    client = TestClient(app.app)
+    resp = client.post("/predict", json={"rows": [ROW]})
+    assert resp.status_code == 400
+    assert resp.json()["detail"].startswith("Colonnes manquantes: ['winter_tires']")
+
+    matrix = [[ROW[c] for c in app.FEATURES]]
+    assert client.post("/predict", json={"input": matrix}).status_code == 200
+
+
+@pytest.mark.parametrize("matrix", [ROW, [1, 2, 3]])
+def test_legacy_input_must_be_a_list_of_lists(matrix):
+    resp = TestClient(app.app).post("/predict", json={"input": matrix})
+    assert _detail(resp) == [
+        {
+            "loc": ["body", "input"],
+            "msg": "Input should be a list of lists",
+            "type": "value_error"
+        }
+    ]
+
+
+class CountingModel:
+    """Stand-in model: predicts the mileage and records each batch size."""
+
+    def __init__(self):
+        self.batches = []
+
+    def predict(self, df):
+        self.batches.append(len(df))
+        return df["mileage"].to_numpy()
+
+
+@pytest.fixture
+def counting_model(monkeypatch):
+    fake = CountingModel()
+    monkeypatch.setattr(app, "model", fake)
+    monkeypatch.setattr(app, "_PRED_CACHE", OrderedDict())
+    return fake
+
+
+def _rows(*mileages):
+    return app.validate_rows([dict(ROW, mileage=m) for m in mileages])
+
+
+def test_cache_hit_skips_the_model(counting_model):
+    first = app._predict_rows_cached(_rows(1000))
+    second = app._predict_rows_cached(_rows(1000))
+    assert first.tolist() == second.tolist() == [1000.0]
+    assert counting_model.batches == [1]
+
+
+def test_duplicate_rows_predicted_once(counting_model):
+    preds = app._predict_rows_cached(_rows(1000, 2000, 1000))
+    assert preds.tolist() == [1000.0, 2000.0, 1000.0]
+    assert counting_model.batches == [2]
+
+
+def test_cache_size_zero_disables_cache(counting_model, monkeypatch):
+    monkeypatch.setattr(app, "PREDICT_CACHE_SIZE", 0)
+    payload = {"rows": _rows(1000), "input": None}
+    app._predict(payload)
+    app._predict(payload)
+    assert counting_model.batches == [1, 1]
+    assert not app._PRED_CACHE
+
+
+def test_cache_evicts_least_recently_used(counting_model, monkeypatch):
+    monkeypatch.setattr(app, "PREDICT_CACHE_SIZE", 2)
+    app._predict_rows_cached(_rows(1000, 2000))
+    app._predict_rows_cached(_rows(1000))  # refresh 1000: 2000 is now oldest
+    app._predict_rows_cached(_rows(3000))
+    assert len(app._PRED_CACHE) == 2
+    assert counting_model.batches == [2, 1]
+
+    app._predict_rows_cached(_rows(1000))
+    assert counting_model.batches == [2, 1]
+    app._predict_rows_cached(_rows(2000))
+    assert counting_model.batches == [2, 1, 1]
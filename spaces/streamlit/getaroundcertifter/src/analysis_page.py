@@ -4,6 +4,7 @@ from __future__ import annotations
 import numpy as np
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
 import plotly.io as pio
 import streamlit as st
 
@@ -21,16 +22,17 @@ from common import (
     COL_PRICE_PER_DAY,
     STATUS_COLORS,
     read_logo,
-    apply_scope,
     pick_value,
     build_curves_masked_solved,
     get_plotly_theme,
     place_title as _place_title,
 )
+from loaders import load_delay, load_scoped
 
 # Apply shared Plotly theme
-pio.templates["getaround"] = get_plotly_theme()
-pio.templates.default = "getaround"
+if "getaround" not in pio.templates:
+    pio.templates["getaround"] = get_plotly_theme()
+    pio.templates.default = "getaround"
 
 
 # Helpers
@@ -39,24 +41,232 @@ def _legend_bottom(fig, y: float = -0.25) -> None:
     fig.update_layout(legend_title_text="", legend=dict(orientation="h", y=y))
 
 
+# Cached helpers below are keyed on the scope string only: frames come from
+# `load_scoped` (`delay_clipped` included), so no DataFrame is hashed on reruns
+@st.cache_resource(show_spinner=False, max_entries=6)
+def _gap_curves(
+    scope: str,
+) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, dict[str, np.ndarray]]:
+    """Gap pool + threshold curves (PART 3), independent of the slider value.
+
+    Shared without a copy, like `home_page._ended`: callers only read it.
+    """
+    df_scoped, _ = load_scoped(scope)
+
+    # Single combined mask; keep only the columns the curves need
+    mask = (
+        df_scoped["delay_clipped"].notna()
+        & df_scoped[COL_GAP].notna()
+        & df_scoped[COL_CHECKIN].isin(["mobile", "connect"])
+    )
+    df_gap = df_scoped.loc[mask, [COL_CHECKIN, "delay_clipped", COL_GAP]]
+    if df_gap.empty:
+        return df_gap, pd.DataFrame(), pd.DataFrame(), {}
+
+    df_gap = df_gap.assign(gap=df_gap[COL_GAP])
+    df_gap = df_gap.assign(was_conflict=df_gap["delay_clipped"] > df_gap["gap"])
+    loss_curve, solved_curve, curves = build_curves_masked_solved(df_gap)
+    return df_gap, loss_curve, solved_curve, curves
+
+
+# Curve colors (PART 3)
+CURVE_COLORS = {
+    "Masquées mobile (%)": COLOR_CI.get("mobile", "#1f77b4"),
+    "Masquées connect (%)": COLOR_CI.get("connect", "#ff7f0e"),
+    "Évités mobile (%)": COLOR_CI.get("mobile", "#1f77b4"),
+    "Évités connect (%)": COLOR_CI.get("connect", "#ff7f0e")
+}
+
+
+# Cached figures: stored as plain dicts (picklable), rebuilt with go.Figure
+@st.cache_data(show_spinner=False)
+def _pie_figure(n_late: int, n_ok: int, n_nan: int) -> dict:
+    """Return-status pie (PART 1)."""
+    labels = ["En retard", "À l'heure / en avance", "Non renseigné"]
+    pie_colors = {
+        "En retard": STATUS_COLORS["En retard"],
+        "À l'heure / en avance": STATUS_COLORS["À l'heure"],
+        "Non renseigné": STATUS_COLORS["Non renseigné"]
+    }
+    fig = px.pie(
+        names=labels,
+        values=[n_late, n_ok, n_nan],
+        hole=0.35,
+        color=labels,
+        color_discrete_map=pie_colors
+    )
+    _place_title(fig, "Statut du retour (avec Non renseigné)")
+    _legend_bottom(fig)
+    fig.update_traces(sort=False, textposition="outside", textinfo="percent+label")
+    return fig.to_dict()
+
+
+@st.cache_data(show_spinner=False)
+def _late_histogram_figure(scope: str) -> dict:
+    """Late-delay histogram (PART 1): ended rentals with a delay > 0."""
+    df_scoped, _ = load_scoped(scope)
+    ended = df_scoped[df_scoped[COL_STATE] == "ended"]
+    late_only = ended.loc[ended["delay_clipped"] > 0, ["delay_clipped"]]
+    fig = px.histogram(
+        late_only,
+        x="delay_clipped",
+        nbins=60,
+        range_x=[0, CLIP_MAX],
+        labels={"delay_clipped": "Retard au checkout (mn, borné)"}
+    )
+    _place_title(fig, "Distribution des retards (minutes)")
+    _legend_bottom(fig)
+    fig.update_layout(plot_bgcolor="white")
+    return fig.to_dict()
+
+
+# Clip bound of the next rental's delay in PART 2 (minutes)
+NEXT_DELAY_MAX = 1000
+
+
+@st.cache_data(show_spinner=False)
+def _next_rental_pairs(scope: str) -> pd.DataFrame:
+    """PART 2 pool: ended mobile/connect rentals A paired with their next rental B.
+
+    Columns: rental id, `delay_clipped` (A), check-in type, `next_delay` (B,
+    clipped to [0, NEXT_DELAY_MAX]); rows with an unknown or negative next
+    delay are dropped.
+    """
+    df_scoped, _ = load_scoped(scope)
+    ended_scoped = df_scoped[
+        df_scoped[COL_STATE].eq("ended")
+        & df_scoped[COL_CHECKIN].isin(["mobile", "connect"])
+    ]
+
+    if not {COL_RENTAL_ID, COL_PREV_ID}.issubset(
+        ended_scoped.columns
+    ) or ended_scoped.empty:
+        return ended_scoped.iloc[0:0]
+
+    # Pair each rental A with the rental B whose previous_ended_rental_id is A
+    # (last B wins on duplicates, as with a dict lookup).
+    following = (
+        ended_scoped.loc[
+            ended_scoped[COL_PREV_ID].notna(), [COL_PREV_ID, "delay_clipped"]
+        ]
+        .drop_duplicates(subset=COL_PREV_ID, keep="last")
+        .rename(columns={"delay_clipped": "next_delay"})
+    )
+    has_next = ended_scoped[[COL_RENTAL_ID, "delay_clipped", COL_CHECKIN]].merge(
+        following,
+        left_on=COL_RENTAL_ID,
+        right_on=COL_PREV_ID,
+        how="inner"
+    )
+    if has_next.empty:
+        return has_next
+
+    # `next_delay >= 0` also drops NaN next delays
+    has_next = has_next[
+        has_next["delay_clipped"].notna() & has_next["next_delay"].ge(0)
+    ]
+    return has_next.assign(next_delay=has_next["next_delay"].clip(0, NEXT_DELAY_MAX))
+
+
+@st.cache_data(show_spinner=False)
+def _propagation_figure(scope: str) -> dict:
+    """Delay propagation scatter (PART 2)."""
+    has_next = _next_rental_pairs(scope)
+    fig = px.scatter(
+        has_next,
+        x="delay_clipped",
+        y="next_delay",
+        color=COL_CHECKIN,
+        color_discrete_map=COLOR_CI,
+        labels={
+            "delay_clipped": "Retard au checkout (mn, borné)",
+            "next_delay": "Retard de la suivante (mn, borné)",
+            COL_CHECKIN: "Type de check-in"
+        }
+    )
+    _place_title(
+        fig,
+        "Propagation du retard : location actuelle → location suivante (périmètre ended uniquement)",
+    )
+    _legend_bottom(fig)
+
+    fig.add_hline(y=0, line_dash="dash", line_color="#999", opacity=0.6)
+    fig.add_vline(x=0, line_dash="dash", line_color="#999", opacity=0.6)
+    fig.update_layout(plot_bgcolor="white")
+    return fig.to_dict()
+
+
+def _curve_figure(curve: pd.DataFrame, title: str) -> go.Figure:
+    """Threshold curve without the threshold overlay (PART 3)."""
+    fig = px.line(
+        curve,
+        x="Seuil (min)",
+        y="value",
+        color="variable",
+        markers=True,
+        color_discrete_map=CURVE_COLORS
+    )
+    _place_title(fig, title)
+    _legend_bottom(fig)
+    fig.update_yaxes(
+        range=[0, 100], tickvals=[0, 20, 40, 60, 80, 100], ticksuffix=" %"
+    )
+    fig.update_traces(hovertemplate="%{y:.1f} % à %{x} min")
+    fig.update_layout(plot_bgcolor="white")
+    return fig
+
+
+@st.cache_data(show_spinner=False)
+def _curve_figures(scope: str) -> tuple[dict, dict]:
+    """Masked / avoided curves per scope; the slider only adds an overlay."""
+    df_gap, loss_curve, solved_curve, _ = _gap_curves(scope)
+
+    fig_loss = _curve_figure(
+        loss_curve, "🔻 % de locations masquées vs seuil (règle produit)"
+    )
+    fig_loss.add_annotation(
+        xref="paper",
+        x=0,
+        yref="paper",
+        y=-0.22,
+        text=f"Basé sur {len(df_gap):,} lignes où l'écart (gap) est connu.",
+        showarrow=False
+    )
+    fig_solved = _curve_figure(
+        solved_curve, " % de conflits historiques évités vs seuil"
+    )
+    return fig_loss.to_dict(), fig_solved.to_dict()
+
+
+def _threshold_overlay(fig: go.Figure, threshold_min: int) -> None:
+    """Mark the selected threshold (dashed line + shaded masked zone)."""
+    fig.add_vline(x=threshold_min, line_dash="dash", line_color="#666", opacity=0.7)
+    fig.add_vrect(
+        x0=0, x1=threshold_min, fillcolor="#777", opacity=0.06, line_width=0
+    )
+
+
+def _curves_csv_bytes(loss_curve: pd.DataFrame, solved_curve: pd.DataFrame) -> bytes:
+    """Both curves as a `;`-separated UTF-8 CSV (BOM included for Excel)."""
+    csv_export = pd.concat(
+        [
+            loss_curve.assign(type_courbe="Masquées (%)"),
+            solved_curve.assign(type_courbe="Évités (%)"),
+        ],
+        ignore_index=True
+    )
+    return csv_export.to_csv(index=False, sep=";").encode("utf-8-sig")
+
+
 # Page
-def page_analyse_retards(
-    df_delay_full: pd.DataFrame,
-    dataset_pricing: pd.DataFrame
-) -> None:
+def page_analyse_retards() -> None:
     """ Operational analysis page """
 
     # Data preparation
-    df_delay = df_delay_full.copy()
-
-    if COL_DELAY_AT_CHECKOUT not in df_delay.columns:
+    if COL_DELAY_AT_CHECKOUT not in load_delay().columns:
         st.warning(f"Colonne '{COL_DELAY_AT_CHECKOUT}' manquante.")
         return
 
-    df_delay["delay_clipped"] = pd.to_numeric(
-        df_delay[COL_DELAY_AT_CHECKOUT], errors="coerce"
-    ).clip(CLIP_MIN, CLIP_MAX)
-
     # Header
     svg = read_logo("getaround_logo.svg")
     if svg:
@@ -86,63 +296,38 @@ def page_analyse_retards(
         ["Toutes les voitures", "Connect uniquement", "Mobile uniquement"],
         horizontal=True
     )
-    df_scoped, dataset_pricing = apply_scope(df_delay, dataset_pricing, scope)
+    df_scoped, dataset_pricing = load_scoped(scope)
     st.markdown("---")
 
     # PART 1 — Delay Distribution
     st.divider()
     st.subheader("Partie 1 - Distribution des retards")
 
-    ended = df_scoped[df_scoped[COL_STATE] == "ended"].copy()
+    ended = df_scoped[df_scoped[COL_STATE] == "ended"]
     col_a, col_b, col_c = st.columns([1.2, 1.8, 0.8])
 
     if ended.empty:
         st.info("Aucune location terminée dans le périmètre actuel.")
     else:
-        # Counts
-        n_ok = int((ended["delay_clipped"] <= 0).sum())
-        n_late = int((ended["delay_clipped"] > 0).sum())
-        n_nan = int(ended["delay_clipped"].isna().sum())
-
-        observed = ended.dropna(subset=["delay_clipped"]).copy()
-        late_only = ended[ended["delay_clipped"] > 0].copy()
-
-        median_delay = (
-            float(late_only["delay_clipped"].median()) if not late_only.empty else 0.0
-        )
-        pct_gt_60_among_lates = (
-            (late_only["delay_clipped"] > 60).mean() * 100.0
-            if not late_only.empty
-            else 0.0
-        )
+        # Counts + KPIs in one pass over the clipped delays
+        arr = ended["delay_clipped"].to_numpy(dtype=np.float32)
+        nan = np.isnan(arr)
+        late = arr > 0  # False on NaN
+        n_nan = int(nan.sum())
+        n_late = int(late.sum())
+        n_ok = arr.size - n_late - n_nan
+
+        gt60 = arr > 60
+        median_delay = float(np.median(arr[late])) if n_late else 0.0
+        pct_gt_60_among_lates = float(gt60[late].mean()) * 100.0 if n_late else 0.0
+        n_observed = arr.size - n_nan
         pct_gt_60_among_observed = (
-            (observed["delay_clipped"] > 60).mean() * 100.0
-            if not observed.empty
-            else 0.0
+            float(gt60.sum()) / n_observed * 100.0 if n_observed else 0.0
         )
 
         # Pie
         with col_a:
-            labels = ["En retard", "À l'heure / en avance", "Non renseigné"]
-            values = [n_late, n_ok, n_nan]
-            pie_colors = {
-                "En retard": STATUS_COLORS["En retard"],
-                "À l'heure / en avance": STATUS_COLORS["À l'heure"],
-                "Non renseigné": STATUS_COLORS["Non renseigné"]
-            }
-
-            fig_pie = px.pie(
-                names=labels,
-                values=values,
-                hole=0.35,
-                color=labels,
-                color_discrete_map=pie_colors
-            )
-            _place_title(fig_pie, "Statut du retour (avec Non renseigné)")
-            _legend_bottom(fig_pie)
-            fig_pie.update_traces(
-                sort=False, textposition="outside", textinfo="percent+label"
-            )
+            fig_pie = go.Figure(_pie_figure(n_late, n_ok, n_nan))
             st.plotly_chart(fig_pie, use_container_width=True)
 
             st.caption(
@@ -154,19 +339,10 @@ def page_analyse_retards(
 
         # Histogram (late only)
         with col_b:
-            if late_only.empty:
+            if not n_late:
                 st.info("Aucun retard > 0 minute dans le périmètre.")
             else:
-                fig_hist = px.histogram(
-                    late_only,
-                    x="delay_clipped",
-                    nbins=60,
-                    range_x=[0, CLIP_MAX],
-                    labels={"delay_clipped": "Retard au checkout (mn, borné)"}
-                )
-                _place_title(fig_hist, "Distribution des retards (minutes)")
-                _legend_bottom(fig_hist)
-                fig_hist.update_layout(plot_bgcolor="white")
+                fig_hist = go.Figure(_late_histogram_figure(scope))
                 st.plotly_chart(fig_hist, use_container_width=True)
 
         # KPIs
@@ -186,63 +362,13 @@ def page_analyse_retards(
     st.divider()
     st.subheader("Partie 2 - Impact des retards sur la location suivante")
 
-    y_max_vis = 1000
-
-    ended_scoped = df_scoped[df_scoped[COL_STATE] == "ended"].copy()
-    ended_scoped = ended_scoped[
-        ended_scoped[COL_CHECKIN].isin(["mobile", "connect"])
-    ].copy()
-
-    if {COL_RENTAL_ID, COL_PREV_ID}.issubset(
-        ended_scoped.columns
-    ) and not ended_scoped.empty:
-        next_map = (
-            ended_scoped.dropna(subset=[COL_PREV_ID])
-            .set_index(COL_PREV_ID)[COL_RENTAL_ID]
-            .to_dict()
-        )
-        ended_scoped["next_rental_id"] = ended_scoped[COL_RENTAL_ID].map(next_map)
-    else:
-        ended_scoped["next_rental_id"] = np.nan
-
-    delay_map = ended_scoped.set_index(COL_RENTAL_ID)["delay_clipped"].to_dict()
-    has_next = ended_scoped.dropna(subset=["next_rental_id"]).copy()
+    has_next = _next_rental_pairs(scope)
 
     if not has_next.empty:
-        has_next["next_rental_id"] = pd.to_numeric(
-            has_next["next_rental_id"], errors="coerce"
-        ).astype("Int64")
-        has_next["next_delay"] = has_next["next_rental_id"].map(delay_map)
-        has_next = has_next.dropna(subset=["delay_clipped", "next_delay"]).copy()
-        has_next = has_next[has_next["next_delay"] >= 0].copy()
-        has_next["next_delay"] = has_next["next_delay"].clip(0, y_max_vis)
-
         pct_late_next = (has_next["next_delay"] > 0).mean() * 100.0
         avg_next_delay = has_next.loc[has_next["next_delay"] > 0, "next_delay"].mean()
 
-        df_plot = has_next.copy()
-        fig_scatter = px.scatter(
-            df_plot,
-            x="delay_clipped",
-            y="next_delay",
-            color=COL_CHECKIN,
-            color_discrete_map=COLOR_CI,
-            labels={
-                "delay_clipped": "Retard au checkout (mn, borné)",
-                "next_delay": "Retard de la suivante (mn, borné)",
-                COL_CHECKIN: "Type de check-in"
-            }
-        )
-        _place_title(
-            fig_scatter,
-            "Propagation du retard : location actuelle → location suivante (périmètre ended uniquement)",
-        )
-        _legend_bottom(fig_scatter)
-
-        fig_scatter.add_hline(y=0, line_dash="dash", line_color="#999", opacity=0.6)
-        fig_scatter.add_vline(x=0, line_dash="dash", line_color="#999", opacity=0.6)
-        fig_scatter.update_layout(plot_bgcolor="white")
-
+        fig_scatter = go.Figure(_propagation_figure(scope))
         st.plotly_chart(fig_scatter, use_container_width=True)
 
         c1, c2 = st.columns(2)
@@ -251,7 +377,7 @@ def page_analyse_retards(
 
         st.caption(
             "Périmètre : `state='ended'`, flux `mobile/connect`. "
-            f"Bornages X=[{CLIP_MIN},{CLIP_MAX}] et Y=[0,{y_max_vis}] mn. "
+            f"Bornages X=[{CLIP_MIN},{CLIP_MAX}] et Y=[0,{NEXT_DELAY_MAX}] mn. "
             "Seuls les couples A→B valides sont conservés."
         )
     else:
@@ -278,50 +404,21 @@ def page_analyse_retards(
         "Le buffer masque les créneaux où l'écart entre deux locations est inférieur au seuil défini ci-dessus."
     )
 
-    df_gap = df_scoped.dropna(subset=["delay_clipped", COL_GAP]).copy()
-    df_gap["gap"] = df_gap[COL_GAP]
-    df_gap = df_gap[df_gap[COL_CHECKIN].isin(["mobile", "connect"])].copy()
+    # Slider-independent prep is cached by scope
+    df_gap, loss_curve, solved_curve, curves = _gap_curves(scope)
 
     if df_gap.empty:
         st.info("Aucune ligne avec gap connu dans le périmètre.")
         return
 
-    df_gap["was_conflict"] = df_gap["delay_clipped"] > df_gap["gap"]
-
-    loss_curve, solved_curve = build_curves_masked_solved(df_gap)
-
-    color_curves = {
-        "Masquées mobile (%)": COLOR_CI.get("mobile", "#1f77b4"),
-        "Masquées connect (%)": COLOR_CI.get("connect", "#ff7f0e"),
-        "Évités mobile (%)": COLOR_CI.get("mobile", "#1f77b4"),
-        "Évités connect (%)": COLOR_CI.get("connect", "#ff7f0e")
-    }
+    loss_fig_dict, solved_fig_dict = _curve_figures(scope)
 
     left, right = st.columns([3, 1])
 
     # Masked share vs threshold
     with left:
-        fig_loss = px.line(
-            loss_curve,
-            x="Seuil (min)",
-            y="value",
-            color="variable",
-            markers=True,
-            color_discrete_map=color_curves
-        )
-        _place_title(fig_loss, "🔻 % de locations masquées vs seuil (règle produit)")
-        _legend_bottom(fig_loss)
-
-        fig_loss.update_yaxes(
-            range=[0, 100], tickvals=[0, 20, 40, 60, 80, 100], ticksuffix=" %"
-        )
-        fig_loss.add_vline(
-            x=threshold_min, line_dash="dash", line_color="#666", opacity=0.7
-        )
-        fig_loss.add_vrect(
-            x0=0, x1=threshold_min, fillcolor="#777", opacity=0.06, line_width=0
-        )
-        fig_loss.update_traces(hovertemplate="%{y:.1f} % à %{x} min")
+        fig_loss = go.Figure(loss_fig_dict)
+        _threshold_overlay(fig_loss, threshold_min)
         fig_loss.add_annotation(
             x=threshold_min,
             yref="paper",
@@ -329,25 +426,16 @@ def page_analyse_retards(
             text=f"Seuil = {threshold_min} mn",
             showarrow=False
         )
-        fig_loss.add_annotation(
-            xref="paper",
-            x=0,
-            yref="paper",
-            y=-0.22,
-            text=f"Basé sur {len(df_gap):,} lignes où l'écart (gap) est connu.",
-            showarrow=False
-        )
-        fig_loss.update_layout(plot_bgcolor="white")
         st.plotly_chart(fig_loss, use_container_width=True)
 
     with right:
         st.metric(
             f"Masquées mobile ({threshold_min} mn)",
-            f"{pick_value(loss_curve, 'Masquées mobile (%)', threshold_min):.2f} %",
+            f"{pick_value(curves, 'Masquées mobile (%)', threshold_min):.2f} %",
         )
         st.metric(
             f"Masquées connect ({threshold_min} mn)",
-            f"{pick_value(loss_curve, 'Masquées connect (%)', threshold_min):.2f} %",
+            f"{pick_value(curves, 'Masquées connect (%)', threshold_min):.2f} %",
         )
         st.caption(
             f"Basé sur {len(df_gap):,} lignes où l'écart (*gap*) entre locations successives est connu."
@@ -359,55 +447,28 @@ def page_analyse_retards(
 
     # Solved conflicts vs threshold
     with left:
-        fig_solved = px.line(
-            solved_curve,
-            x="Seuil (min)",
-            y="value",
-            color="variable",
-            markers=True,
-            color_discrete_map=color_curves
-        )
-        _place_title(fig_solved, " % de conflits historiques évités vs seuil")
-        _legend_bottom(fig_solved)
-
-        fig_solved.update_yaxes(
-            range=[0, 100], tickvals=[0, 20, 40, 60, 80, 100], ticksuffix=" %"
-        )
-        fig_solved.add_vline(
-            x=threshold_min, line_dash="dash", line_color="#666", opacity=0.7
-        )
-        fig_solved.add_vrect(
-            x0=0, x1=threshold_min, fillcolor="#777", opacity=0.06, line_width=0
-        )
-        fig_solved.update_traces(hovertemplate="%{y:.1f} % à %{x} min")
-        fig_solved.update_layout(plot_bgcolor="white")
+        fig_solved = go.Figure(solved_fig_dict)
+        _threshold_overlay(fig_solved, threshold_min)
         st.plotly_chart(fig_solved, use_container_width=True)
 
     with right:
         st.metric(
             f"Conflits évités mobile ({threshold_min} mn)",
-            f"{pick_value(solved_curve, 'Évités mobile (%)', threshold_min):.2f} %",
+            f"{pick_value(curves, 'Évités mobile (%)', threshold_min):.2f} %",
         )
         st.metric(
             f"Conflits évités connect ({threshold_min} mn)",
-            f"{pick_value(solved_curve, 'Évités connect (%)', threshold_min):.2f} %",
+            f"{pick_value(curves, 'Évités connect (%)', threshold_min):.2f} %",
         )
         st.caption(
             "✔️ *Masquées (%)* : part des locations qui seraient cachées si gap < seuil.\n"
             "✔️ *Évités (%)* : part des conflits historiques évités grâce à ce masquage."
         )
 
-    csv_export = pd.concat(
-        [
-            loss_curve.assign(type_courbe="Masquées (%)"),
-            solved_curve.assign(type_courbe="Évités (%)"),
-        ],
-        ignore_index=True
-    )
-
+    # CSV is only generated when the button is clicked
     st.download_button(
         label="⬇️ Télécharger les courbes (CSV)",
-        data=csv_export.to_csv(index=False, sep=";", encoding="utf-8-sig"),
+        data=lambda: _curves_csv_bytes(loss_curve, solved_curve),
         file_name=f"courbes_getaround_{threshold_min}mn.csv",
         mime="text/csv"
     )
@@ -487,26 +548,27 @@ def page_analyse_retards(
         st.info(f"La colonne '{COL_GAP}' n’est pas disponible.")
         return
 
-    eligible = df_scoped.dropna(subset=["delay_clipped", COL_GAP]).copy()
-    eligible["gap"] = eligible[COL_GAP].astype(float)
-    if COL_STATE in eligible.columns:
-        eligible = eligible[eligible[COL_STATE] == "ended"].copy()
+    eligible_mask = df_scoped["delay_clipped"].notna() & df_scoped[COL_GAP].notna()
+    if COL_STATE in df_scoped.columns:
+        eligible_mask &= df_scoped[COL_STATE].eq("ended")
+    eligible = df_scoped.loc[eligible_mask, ["delay_clipped", COL_GAP]]
 
     if eligible.empty:
         st.info("Aucune ligne éligible (retard & gap connus dans 'ended').")
         return
 
-    # KPIs
-    affected_mask = eligible["gap"] < threshold_min
+    # KPIs — one comparison per condition, reused across metrics
+    gap = eligible[COL_GAP].to_numpy(dtype=float)
+    delay = eligible["delay_clipped"].to_numpy()
+    under = gap < threshold_min
+    conflict = delay > gap
+
     n_eligible = int(len(eligible))
-    n_affected = int(affected_mask.sum())
+    n_affected = int(under.sum())
     pct_affected = (n_affected / n_eligible * 100.0) if n_eligible else 0.0
 
-    conflict_before = eligible["delay_clipped"] > eligible["gap"]
-    resolved_mask = conflict_before & (eligible["gap"] < threshold_min)
-
-    n_problematic = int(conflict_before.sum())
-    n_resolved = int(resolved_mask.sum())
+    n_problematic = int(conflict.sum())
+    n_resolved = int((conflict & under).sum())
     pct_resolved = (n_resolved / n_problematic * 100.0) if n_problematic else 0.0
 
     avg_booking_value = mean_daily_price * avg_duration_days
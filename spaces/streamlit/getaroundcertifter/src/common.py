@@ -127,8 +127,12 @@ def require_cols(df: pd.DataFrame, cols: set[str], label: str) -> bool:
     return True
 
 
+@st.cache_resource(show_spinner=False)
 def read_logo(name: str = "getaround_logo.svg") -> Optional[str]:
-    """Safely load a local SVG asset bundled with the app (returns None if unavailable)."""
+    """Safely load a local SVG asset bundled with the app (returns None if unavailable).
+
+    Static file: read once per process, not on every rerun.
+    """
     try:
         path = Path(__file__).resolve().parent / name
         return path.read_text(encoding="utf-8")
@@ -141,58 +145,57 @@ def apply_scope(
     pricing: pd.DataFrame,
     scope: str,
 ) -> tuple[pd.DataFrame, pd.DataFrame]:
-    """Apply the selected scope consistently to both delay and pricing datasets."""
-    df = df_delay.copy()
-    pr = pricing.copy()
-
-    # Normalize boolean for the connect flag if present
-    if COL_HAS_CONNECT in pr.columns:
-        pr[COL_HAS_CONNECT] = (
-            pr[COL_HAS_CONNECT].astype("boolean").fillna(False)
-        )
+    """Apply the selected scope consistently to both delay and pricing datasets.
+
+    Cached per scope by `loaders.load_scoped`.
+    """
+    # No upfront copies: boolean indexing already returns new frames and
+    # callers only read the results. The connect flag is a plain bool
+    # column already (normalized in `load_pricing`).
+    df, pr = df_delay, pricing
 
     if scope == "Connect uniquement":
         if COL_CHECKIN in df.columns:
-            df = df[df[COL_CHECKIN].eq("connect")].copy()
+            df = df[df[COL_CHECKIN].eq("connect")]
         if COL_HAS_CONNECT in pr.columns:
-            pr = pr[pr[COL_HAS_CONNECT]].copy()
+            pr = pr[pr[COL_HAS_CONNECT]]
 
     elif scope == "Mobile uniquement":
         if COL_CHECKIN in df.columns:
-            df = df[df[COL_CHECKIN].eq("mobile")].copy()
+            df = df[df[COL_CHECKIN].eq("mobile")]
         # No safe "mobile-only" filter on the pricing dataset; keep as is.
 
     return df, pr
 
 
-# Cached aggregations
-@st.cache_data(show_spinner=False)
-def state_pct(df_delay_scoped: pd.DataFrame) -> pd.DataFrame:
-    """Compute the percentage breakdown of booking states."""
-    return (
-        df_delay_scoped[COL_STATE]
+# Aggregations (plain functions: pages cache their results per scope)
+def _share_pct(values: pd.Series, label: str) -> pd.DataFrame:
+    """Percentage of each observed value, as `[label, 'Pourcentage']` rows."""
+    shares = (
+        values
         .dropna()
         .value_counts(normalize=True)
+        .loc[lambda s: s > 0]  # categoricals also list unobserved categories
         .mul(100)
-        .rename_axis("Statut de réservation")
+        .rename_axis(label)
         .reset_index(name="Pourcentage")
     )
+    # Plain labels: a categorical column would keep the unobserved categories
+    # in the px axis / legend ordering
+    shares[label] = shares[label].astype(str)
+    return shares
+
+
+def state_pct(df_delay_scoped: pd.DataFrame) -> pd.DataFrame:
+    """Compute the percentage breakdown of booking states."""
+    return _share_pct(df_delay_scoped[COL_STATE], "Statut de réservation")
 
 
-@st.cache_data(show_spinner=False)
 def checkin_pct(df_delay_scoped: pd.DataFrame) -> pd.DataFrame:
     """Compute the percentage breakdown of check-in types."""
-    return (
-        df_delay_scoped[COL_CHECKIN]
-        .dropna()
-        .value_counts(normalize=True)
-        .mul(100)
-        .rename_axis("Type de check-in")
-        .reset_index(name="Pourcentage")
-    )
+    return _share_pct(df_delay_scoped[COL_CHECKIN], "Type de check-in")
 
 
-@st.cache_data(show_spinner=False)
 def checkout_counts(df_delay_scoped: pd.DataFrame) -> pd.DataFrame:
     """Aggregate checkout outcomes (early/on-time/late) by check-in type for KPI charts."""
     cols = [COL_CHECKIN, COL_DELAY_AT_CHECKOUT]
@@ -211,90 +214,94 @@ def checkout_counts(df_delay_scoped: pd.DataFrame) -> pd.DataFrame:
             }
         )
 
-    df["checkout_status"] = pd.cut(
-        df[COL_DELAY_AT_CHECKOUT],
-        bins=[-1e9, -1e-9, 1e-9, 1e9],
-        labels=ORDER_STATUS,
-        include_lowest=True
+    # Sign bucket → codes 0/1/2 in ORDER_STATUS order (early / on time / late)
+    delay = df[COL_DELAY_AT_CHECKOUT].to_numpy(dtype=np.float32)
+    codes = (delay > 1e-9).astype(np.int8) - (delay <= -1e-9).astype(np.int8) + 1
+    df["checkout_status"] = pd.Categorical.from_codes(
+        codes, categories=ORDER_STATUS, ordered=True
     )
 
-    counts = (
-        df.groupby([COL_CHECKIN, "checkout_status"], observed=True)
-        .size()
-        .reset_index(name="n")
-    )
-    counts["total_type"] = counts.groupby(COL_CHECKIN)["n"].transform("sum")
+    # One pass over the rows; totals are derived from the (tiny) grouped sizes
+    n = df.groupby([COL_CHECKIN, "checkout_status"], observed=True).size()
+    total = n.groupby(level=0, observed=True).sum()
+
+    counts = n.reset_index(name="n")
+    counts["total_type"] = total.reindex(n.index.get_level_values(0)).to_numpy()
     counts["pct"] = counts["n"] / counts["total_type"] * 100
     return counts
 
 
 # Analytics helpers
-def pick_value(df_long: pd.DataFrame, label: str, t: int) -> float:
-    """Safely extract a metric value from a long-format curve at a given threshold.
+def pick_value(curves: dict[str, np.ndarray], label: str, t: float) -> float:
+    """Safely extract a metric value from a curve at a given threshold.
 
-    If the exact threshold is missing, the value is linearly interpolated
-    between the nearest lower and higher available thresholds.
+    `curves` maps each label to its values on the 0..180 grid (as returned by
+    `build_curves_masked_solved`). Integer thresholds are a direct index;
+    anything else is linearly interpolated and clamped to the grid ends.
     """
-    sub = df_long[df_long["variable"] == label].sort_values("Seuil (min)")
-    if sub.empty:
+    values = curves.get(label)
+    if values is None or len(values) == 0:
         return 0.0
-    if t in set(sub["Seuil (min)"]):
-        return float(sub.loc[sub["Seuil (min)"] == t, "value"].iloc[0])
-
-    # Linear interpolation on the nearest neighbors
-    lo = sub[sub["Seuil (min)"] <= t].tail(1)
-    hi = sub[sub["Seuil (min)"] >= t].head(1)
-    if lo.empty:
-        return float(hi["value"].iloc[0])
-    if hi.empty:
-        return float(lo["value"].iloc[0])
+    if 0 <= t < len(values) and t == int(t):
+        return float(values[int(t)])
+    return float(np.interp(t, np.arange(len(values)), values))
 
-    x0, y0 = int(lo["Seuil (min)"].iloc[0]), float(lo["value"].iloc[0])
-    x1, y1 = int(hi["Seuil (min)"].iloc[0]), float(hi["value"].iloc[0])
-    w = (t - x0) / (x1 - x0) if x1 != x0 else 0.0
-    return y0 + w * (y1 - y0)
 
-
-@st.cache_data(show_spinner=False)
 def build_curves_masked_solved(
     df_gap: pd.DataFrame,
-) -> tuple[pd.DataFrame, pd.DataFrame]:
+) -> tuple[pd.DataFrame, pd.DataFrame, dict[str, np.ndarray]]:
     """Precompute long-format curves for the gap policy.
 
-    Returns two long DataFrames (% masked, % avoided conflicts) across thresholds 0..180 minutes.
+    Returns two long DataFrames (% masked, % avoided conflicts) across thresholds 0..180 minutes,
+    plus the same curves as `{label: values}` arrays indexed by threshold (for `pick_value`).
     - Masked: gap < t  (base: all rows per check-in type)
     - Avoided: was_conflict & (gap < t)  (base: conflicts per check-in type)
 
     Expected columns in df_gap: ['gap', 'was_conflict', COL_CHECKIN].
     """
     thresholds = np.arange(0, 181, 1, dtype=int)
-    rows_loss: list[dict] = []
-    rows_solved: list[dict] = []
-
-    for t in thresholds:
-        for ci in ("mobile", "connect"):
-            sub = df_gap[df_gap[COL_CHECKIN] == ci]
-            denom_loss = len(sub)
-            denom_solved = int(sub["was_conflict"].sum())
-
-            masked = int((sub["gap"] < t).sum())  # masked if gap < t
-            solved = int(((sub["gap"] < t) & sub["was_conflict"]).sum())
-
-            rows_loss.append(
-                {
-                    "Seuil (min)": t,
-                    "variable": f"Masquées {ci} (%)",
-                    "value": (masked / denom_loss * 100) if denom_loss else 0.0,
-                }
-            )
-            rows_solved.append(
-                {
-                    "Seuil (min)": t,
-                    "variable": f"Évités {ci} (%)",
-                    "value": (solved / denom_solved * 100) if denom_solved else 0.0,
-                }
-            )
-
-    loss_curve = pd.DataFrame(rows_loss)
-    solved_curve = pd.DataFrame(rows_solved)
-    return loss_curve, solved_curve
+    loss_cols: dict[str, np.ndarray] = {}
+    solved_cols: dict[str, np.ndarray] = {}
+
+    # Columns pulled out once; check-in types compared as categorical codes
+    checkin = df_gap[COL_CHECKIN].astype("category")
+    categories = checkin.cat.categories
+    codes = checkin.cat.codes.to_numpy()
+    # Whole minutes: float32 is exact and halves the bytes sorted/searched
+    all_gaps = df_gap["gap"].to_numpy(dtype=np.float32)
+    all_conflicts = df_gap["was_conflict"].to_numpy(dtype=bool)
+    grid = thresholds.astype(np.float32)  # same dtype as the searched arrays
+
+    for ci in ("mobile", "connect"):
+        code = categories.get_loc(ci) if ci in categories else -2  # -1 is NaN
+        in_ci = codes == code
+        gaps = np.sort(all_gaps[in_ci])
+        conflict_gaps = np.sort(all_gaps[in_ci & all_conflicts])
+
+        # Count of gaps strictly below each threshold, for all thresholds at once
+        masked = np.searchsorted(gaps, grid, side="left")
+        solved = np.searchsorted(conflict_gaps, grid, side="left")
+
+        denom_loss = len(gaps)
+        denom_solved = len(conflict_gaps)
+        loss_cols[f"Masquées {ci} (%)"] = (
+            masked / denom_loss * 100 if denom_loss else np.zeros(len(thresholds))
+        )
+        solved_cols[f"Évités {ci} (%)"] = (
+            solved / denom_solved * 100 if denom_solved else np.zeros(len(thresholds))
+        )
+
+    def _long(cols: dict[str, np.ndarray]) -> pd.DataFrame:
+        # Threshold-major order: (t0, mobile), (t0, connect), (t1, mobile), ...
+        labels = list(cols)
+        return pd.DataFrame(
+            {
+                "Seuil (min)": np.repeat(thresholds, len(labels)),
+                "variable": np.tile(labels, len(thresholds)),
+                "value": np.column_stack(list(cols.values())).ravel(),
+            }
+        )
+
+    loss_curve = _long(loss_cols)
+    solved_curve = _long(solved_cols)
+    return loss_curve, solved_curve, {**loss_cols, **solved_cols}
@@ -1,8 +1,13 @@
 # main_page.py
 from __future__ import annotations
 
+from typing import Optional
+
+import numpy as np
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
 import plotly.io as pio
 import streamlit as st
 
@@ -13,12 +18,12 @@ from common import (
     COL_CAR_ID,
     COL_HAS_CONNECT,
     COL_CAR_TYPE,
+    BRAND_BLUE,
     COLOR_CI,
     RESA_COLORS,
     ORDER_STATUS,
     COL_PRICE_PER_DAY,
     read_logo,
-    apply_scope,
     state_pct,
     checkin_pct,
     checkout_counts,
@@ -26,14 +31,16 @@ from common import (
     get_plotly_theme,
     place_title as _place_title,
 )
+from loaders import load_scoped
 
-# Apply the shared Plotly theme
-pio.templates["getaround"] = get_plotly_theme()
-pio.templates.default = "getaround"
+# Apply the shared Plotly theme (registered once, by whichever page loads first)
+if "getaround" not in pio.templates:
+    pio.templates["getaround"] = get_plotly_theme()
+    pio.templates.default = "getaround"
 
 
 # Page
-def main_page(dataset_pricing: pd.DataFrame, df_delay: pd.DataFrame) -> None:
+def main_page() -> None:
     """ Home page of the dashboard — overall KPIs, behavior, pricing structure."""
 
     # Branding area (logo + title)
@@ -51,6 +58,16 @@ def main_page(dataset_pricing: pd.DataFrame, df_delay: pd.DataFrame) -> None:
         f"Dernière mise à jour : {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M')}"
     )
 
+    _scoped_sections()
+
+
+@st.fragment
+def _scoped_sections() -> None:
+    """Scope radio + everything it drives (KPIs, charts, pricing).
+
+    Run as a fragment: changing the scope reruns this block only, not the
+    whole app script (router, loaders, sidebar, header).
+    """
     # Scope selection (once)
     scope = st.radio(
         "Portée des indicateurs",
@@ -58,8 +75,8 @@ def main_page(dataset_pricing: pd.DataFrame, df_delay: pd.DataFrame) -> None:
         horizontal=True
     )
 
-    # Normalize columns + apply scope
-    df_scoped, pricing_scoped = apply_scope(df_delay, dataset_pricing, scope)
+    # Apply scope (cached per scope string)
+    df_scoped, pricing_scoped = load_scoped(scope)
 
     # Safety checks
     if df_scoped.empty:
@@ -83,6 +100,9 @@ def main_page(dataset_pricing: pd.DataFrame, df_delay: pd.DataFrame) -> None:
     ):
         return
 
+    # "ended" subset, shared with charts C/D (see `_ended`)
+    df_ended = _ended(scope)
+
     # KPI Overview
     st.header("Quelques chiffres")
     col1, col2, col3 = st.columns(3)
@@ -94,26 +114,32 @@ def main_page(dataset_pricing: pd.DataFrame, df_delay: pd.DataFrame) -> None:
         )
 
     with col2:
+        # Plain NumPy bool means (no nullable-boolean reduction path)
         if COL_HAS_CONNECT in pricing_scoped.columns:
+            has_connect = pricing_scoped[COL_HAS_CONNECT].to_numpy(dtype=bool)
             st.metric(
                 "Voitures équipées Connect (scope)",
-                f"{pricing_scoped[COL_HAS_CONNECT].mean() * 100:.1f} %"
+                f"{has_connect.mean() * 100:.1f} %"
             )
+        # Categorical `eq` compares codes
+        via_connect = df_scoped[COL_CHECKIN].eq("connect").to_numpy(dtype=bool)
         st.metric(
             "Locations via Connect (scope)",
-            f"{df_scoped[COL_CHECKIN].eq('connect').mean() * 100:.1f} %"
+            f"{via_connect.mean() * 100:.1f} %"
         )
 
     with col3:
         # Use ended subset for delay KPIs
-        df_ended = df_scoped[df_scoped[COL_STATE].eq("ended")].copy()
-        s_delay = df_ended[COL_DELAY_AT_CHECKOUT]
+        delay = df_ended[COL_DELAY_AT_CHECKOUT].to_numpy(dtype=np.float32)
 
-        observed = s_delay.dropna()
+        # One NaN mask, one comparison on the observed values
+        observed = delay[~np.isnan(delay)]
+        n_observed = observed.size
+        n_late = int((observed > 0).sum())
 
-        late_pct = observed.gt(0).mean() * 100 if len(observed) else 0.0
-        ok_pct = observed.le(0).mean() * 100 if len(observed) else 0.0
-        missing_pct = s_delay.isna().mean() * 100 if len(s_delay) else 0.0
+        late_pct = n_late / n_observed * 100 if n_observed else 0.0
+        ok_pct = (n_observed - n_late) / n_observed * 100 if n_observed else 0.0
+        missing_pct = (delay.size - n_observed) / delay.size * 100 if delay.size else 0.0
 
         st.metric("Retours en retard (parmi observés ended)", f"{late_pct:.1f} %")
         st.metric("À l'heure / en avance (parmi observés ended)", f"{ok_pct:.1f} %")
@@ -121,8 +147,84 @@ def main_page(dataset_pricing: pd.DataFrame, df_delay: pd.DataFrame) -> None:
 
     st.markdown("---")
 
-    # Behavior analysis (4 charts)
-    height = 340
+    # Behavior analysis (4 charts, figures cached per scope)
+    fig_a, fig_b, fig_c, fig_d = _behavior_figures(scope)
+
+    # Layout grid for the 4 charts
+    r1c1, r1c2 = st.columns(2)
+    r2c1, r2c2 = st.columns(2)
+    if fig_a is not None:
+        r1c1.plotly_chart(go.Figure(fig_a), use_container_width=True)
+    else:
+        r1c1.info("Aucune réservation dans ce scope — graphique non disponible.")
+    r1c2.plotly_chart(go.Figure(fig_b), use_container_width=True)
+    r2c1.plotly_chart(go.Figure(fig_c), use_container_width=True)
+    r2c2.plotly_chart(go.Figure(fig_d), use_container_width=True)
+
+    st.markdown("---")
+
+    # Pricing analysis
+    st.subheader("Aperçu du parc (pricing)")
+    cm1, cm2, cm3, cm4 = st.columns(4)
+
+    with cm1:
+        st.metric("Parc (pricing, scope)", f"{len(pricing_scoped):,}")
+    with cm2:
+        st.metric(
+            "Prix moyen ($/jour)",
+            f"{pricing_scoped[COL_PRICE_PER_DAY].mean():.0f}"
+        )
+    with cm3:
+        st.metric(
+            "Prix médian ($/jour)",
+            f"{pricing_scoped[COL_PRICE_PER_DAY].median():.0f}"
+        )
+    with cm4:
+        st.metric(
+            "Écart-type ($/jour)",
+            f"{pricing_scoped[COL_PRICE_PER_DAY].std():.0f}"
+        )
+
+    c1, c2 = st.columns(2)
+    fig_hist, fig_box = _pricing_figures(scope)
+
+    # E — price/day distribution (histogram)
+    with c1:
+        st.plotly_chart(go.Figure(fig_hist), use_container_width=True)
+
+    # F — price/day by car type (boxplot)
+    with c2:
+        if fig_box is not None:
+            st.plotly_chart(go.Figure(fig_box), use_container_width=True)
+        else:
+            st.info("Colonne 'car_type' absente — Boxplot non disponible.")
+
+
+@st.cache_resource(show_spinner=False, max_entries=6)
+def _ended(scope: str) -> pd.DataFrame:
+    """"ended" rentals of `scope`, filtered once for the delay KPIs and charts C/D.
+
+    Shared like `load_scoped`'s frames (no copy): callers only read it.
+    """
+    df_scoped, _ = load_scoped(scope)
+    return df_scoped.loc[df_scoped[COL_STATE].eq("ended")]
+
+
+# Layout pieces shared by the home page charts
+_LEGEND_BOTTOM = {"legend_title_text": "", "legend": {"orientation": "h", "y": -0.2}}
+_PCT_YAXIS = {"range": [0, 100], "tickvals": [0, 20, 40, 60, 80, 100], "ticksuffix": " %"}
+
+
+# Cached figures, keyed on the scope string (plain dicts; the page only
+# rebuilds them with go.Figure)
+@st.cache_data(show_spinner=False)
+def _behavior_figures(
+    scope: str,
+    height: int = 340,
+) -> tuple[Optional[dict], dict, dict, dict]:
+    """Charts A–D: booking status, check-in modes, checkout outcomes (% and n)."""
+    df_scoped, _ = load_scoped(scope)
+    df_ended = _ended(scope)
 
     # A — booking completion status (100% stacked bar)
     state_data = state_pct(df_scoped).copy()  # ['Statut de réservation', 'Pourcentage']
@@ -148,6 +250,7 @@ def main_page(dataset_pricing: pd.DataFrame, df_delay: pd.DataFrame) -> None:
             legend=dict(orientation="h", y=-0.3)
         )
         _place_title(fig_a, "Réservations achevées vs annulées (100%)")
+        fig_a = fig_a.to_dict()
     else:
         fig_a = None
 
@@ -162,113 +265,152 @@ def main_page(dataset_pricing: pd.DataFrame, df_delay: pd.DataFrame) -> None:
         color_discrete_map=COLOR_CI
     )
     fig_b.update_traces(texttemplate="%{y:.1f}%", textposition="outside")
-    fig_b.update_layout(legend_title_text="", legend=dict(orientation="h", y=-0.2))
-    fig_b.update_yaxes(
-        range=[0, 100], tickvals=[0, 20, 40, 60, 80, 100], ticksuffix=" %"
-    )
+    fig_b.update_layout(yaxis=_PCT_YAXIS, **_LEGEND_BOTTOM)
     _place_title(fig_b, "Répartition des modes de check-in (%)")
 
     # C/D — ended only for meaningful delay status
-    df_for_counts = df_scoped[df_scoped[COL_STATE].eq("ended")].copy()
-    counts = checkout_counts(df_for_counts)
+    counts = checkout_counts(df_ended)
+    by_status = dict(
+        x="checkout_status",
+        color=COL_CHECKIN,
+        barmode="group",
+        category_orders={"checkout_status": ORDER_STATUS},
+        color_discrete_map=COLOR_CI
+    )
 
     # C — return share by check-in type (%)
     fig_c = px.bar(
         counts,
-        x="checkout_status",
         y="pct",
-        color=COL_CHECKIN,
-        barmode="group",
-        category_orders={"checkout_status": ORDER_STATUS},
         text="pct",
-        color_discrete_map=COLOR_CI,
-        labels={"checkout_status": "Statut du départ", "pct": "Proportion (%)"}
+        labels={"checkout_status": "Statut du départ", "pct": "Proportion (%)"},
+        **by_status
     )
     fig_c.update_traces(texttemplate="%{text:.1f}%", textposition="outside")
-    fig_c.update_yaxes(
-        range=[0, 100], tickvals=[0, 20, 40, 60, 80, 100], ticksuffix=" %"
-    )
-    fig_c.update_layout(legend_title_text="", legend=dict(orientation="h", y=-0.2))
+    fig_c.update_layout(yaxis=_PCT_YAXIS, **_LEGEND_BOTTOM)
     _place_title(fig_c, "Répartition (%) des retours selon le type de check-in")
 
     # D — return count by check-in type (n)
     fig_d = px.bar(
         counts,
-        x="checkout_status",
         y="n",
-        color=COL_CHECKIN,
-        barmode="group",
-        category_orders={"checkout_status": ORDER_STATUS},
         text="n",
-        color_discrete_map=COLOR_CI,
-        labels={"checkout_status": "Statut du départ", "n": "Nombre"}
+        labels={"checkout_status": "Statut du départ", "n": "Nombre"},
+        **by_status
     )
     fig_d.update_traces(texttemplate="%{text:,}", textposition="outside")
-    fig_d.update_layout(legend_title_text="", legend=dict(orientation="h", y=-0.2))
+    fig_d.update_layout(**_LEGEND_BOTTOM)
     _place_title(fig_d, "Nombre de retours par type de check-in")
 
-    # Layout grid for the 4 charts
-    r1c1, r1c2 = st.columns(2)
-    r2c1, r2c2 = st.columns(2)
-    r1c1.plotly_chart(fig_a, use_container_width=True)
-    r1c2.plotly_chart(fig_b, use_container_width=True)
-    r2c1.plotly_chart(fig_c, use_container_width=True)
-    r2c2.plotly_chart(fig_d, use_container_width=True)
-
-    st.markdown("---")
-
-    # Pricing analysis
-    st.subheader("Aperçu du parc (pricing)")
-    cm1, cm2, cm3, cm4 = st.columns(4)
-
-    with cm1:
-        st.metric("Parc (pricing, scope)", f"{len(pricing_scoped):,}")
-    with cm2:
-        st.metric(
-            "Prix moyen ($/jour)",
-            f"{pricing_scoped[COL_PRICE_PER_DAY].mean():.0f}"
-        )
-    with cm3:
-        st.metric(
-            "Prix médian ($/jour)",
-            f"{pricing_scoped[COL_PRICE_PER_DAY].median():.0f}"
-        )
-    with cm4:
-        st.metric(
-            "Écart-type ($/jour)",
-            f"{pricing_scoped[COL_PRICE_PER_DAY].std():.0f}"
+    return fig_a, fig_b.to_dict(), fig_c.to_dict(), fig_d.to_dict()
+
+
+def _box_stats(values: np.ndarray) -> tuple[dict[str, float], np.ndarray]:
+    """Tukey box summary (quartiles, 1.5 IQR fences) and the points outside the fences."""
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    inside = (values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)
+    stats = {
+        "q1": q1,
+        "median": median,
+        "q3": q3,
+        "lowerfence": values[inside].min(),
+        "upperfence": values[inside].max(),
+    }
+    return stats, values[~inside]
+
+
+@st.cache_data(show_spinner=False)
+def _pricing_figures(scope: str) -> tuple[dict, Optional[dict]]:
+    """Charts E–F: price/day distribution and price/day by car type (if available).
+
+    Aggregated server-side (30 bin counts, box summaries + outliers) so the
+    browser never receives one point per car.
+    """
+    _, pricing_scoped = load_scoped(scope)
+    # E — price/day distribution (histogram + box marginal)
+    prices = pricing_scoped[COL_PRICE_PER_DAY].dropna().to_numpy(dtype=float)
+    counts, edges = np.histogram(prices, bins=30)
+    fig_hist = make_subplots(
+        rows=2, cols=1, shared_xaxes=True, row_heights=[0.2, 0.8], vertical_spacing=0.03
+    )
+    if prices.size:
+        stats, outliers = _box_stats(prices)
+        fig_hist.add_trace(
+            go.Box(
+                **{k: [v] for k, v in stats.items()},
+                y=[""],
+                orientation="h",
+                name="",
+                showlegend=False
+            ),
+            row=1, col=1
         )
-
-    c1, c2 = st.columns(2)
-
-    # E — price/day distribution (histogram)
-    with c1:
-        fig_hist = px.histogram(
-            pricing_scoped,
-            x=COL_PRICE_PER_DAY,
-            nbins=30,
-            marginal="violin",
-            labels={COL_PRICE_PER_DAY: "Prix par jour ($)"}
+        fig_hist.add_trace(
+            go.Scatter(
+                x=outliers,
+                y=[""] * len(outliers),
+                mode="markers",
+                marker=dict(color=BRAND_BLUE),
+                showlegend=False,
+                hoverinfo="x"
+            ),
+            row=1, col=1
         )
-        fig_hist.update_layout(plot_bgcolor="white")
-        _place_title(fig_hist, "Distribution des prix par jour")
-        st.plotly_chart(fig_hist, use_container_width=True)
+    fig_hist.add_trace(
+        go.Bar(
+            x=(edges[:-1] + edges[1:]) / 2,
+            y=counts,
+            width=np.diff(edges),
+            marker=dict(color=BRAND_BLUE),
+            showlegend=False,
+            hovertemplate="%{x:.0f} $ : %{y}<extra></extra>"
+        ),
+        row=2, col=1
+    )
+    fig_hist.update_xaxes(title_text="Prix par jour ($)", row=2, col=1)
+    fig_hist.update_yaxes(title_text="count", row=2, col=1)
+    fig_hist.update_layout(plot_bgcolor="white", bargap=0)
+    _place_title(fig_hist, "Distribution des prix par jour")
 
     # F — price/day by car type (boxplot)
-    with c2:
-        if "car_type" in pricing_scoped.columns:
-            fig_box = px.box(
-                pricing_scoped,
-                x=COL_CAR_TYPE,
-                y=COL_PRICE_PER_DAY,
-                points="outliers",
-                labels={
-                    "rental_price_per_day": "Prix par jour ($)",
-                    "car_type": "Type de véhicule"
-                }
-            )
-            fig_box.update_layout(plot_bgcolor="white", xaxis_tickangle=-30)
-            _place_title(fig_box, "Prix par jour selon type de véhicule")
-            st.plotly_chart(fig_box, use_container_width=True)
-        else:
-            st.info("Colonne 'car_type' absente — Boxplot non disponible.")
+    if COL_CAR_TYPE not in pricing_scoped.columns:
+        return fig_hist.to_dict(), None
+
+    names: list[str] = []
+    box: dict[str, list[float]] = {}
+    outlier_x: list[str] = []
+    outlier_y: list[float] = []
+    grouped = pricing_scoped.groupby(COL_CAR_TYPE, sort=False, observed=True)[COL_PRICE_PER_DAY]
+    for name, values in grouped:
+        values = values.dropna().to_numpy(dtype=float)
+        if not values.size:
+            continue
+        stats, outliers = _box_stats(values)
+        names.append(name)
+        for k, v in stats.items():
+            box.setdefault(k, []).append(v)
+        outlier_x.extend([name] * len(outliers))
+        outlier_y.extend(outliers.tolist())
+
+    fig_box = go.Figure(
+        [
+            go.Box(x=names, **box, name="", showlegend=False),
+            go.Scatter(
+                x=outlier_x,
+                y=outlier_y,
+                mode="markers",
+                marker=dict(color=BRAND_BLUE),
+                showlegend=False,
+                hoverinfo="y"
+            ),
+        ]
+    )
+    fig_box.update_layout(
+        plot_bgcolor="white",
+        xaxis_tickangle=-30,
+        xaxis_title="Type de véhicule",
+        yaxis_title="Prix par jour ($)"
+    )
+    _place_title(fig_box, "Prix par jour selon type de véhicule")
+    return fig_hist.to_dict(), fig_box.to_dict()
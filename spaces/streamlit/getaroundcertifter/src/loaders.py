@@ -1,19 +1,53 @@
 # loaders.py
 from __future__ import annotations
 
+import hashlib
+import json
 import os
-from typing import Optional, Any
+import random
+import threading
+import time
+from operator import itemgetter
+from typing import Callable, Optional, Any
 
+import diskcache
+import httpx
+import numpy as np
+import orjson
 import pandas as pd
-import requests
 import streamlit as st
 
+from common import (
+    CLIP_MAX,
+    CLIP_MIN,
+    COL_CHECKIN,
+    COL_DELAY_AT_CHECKOUT,
+    COL_GAP,
+    COL_HAS_CONNECT,
+    COL_STATE,
+    apply_scope,
+)
+
 
 XLSX_URL: str = os.getenv(
     "GETAROUND_DELAY_XLSX_URL",
     "https://huggingface.co/datasets/flodussart/getaround_xls_certif/resolve/main/get_around_delay_analysis.xlsx"
 )
 
+# Columnar mirror of the delay workbook (same data, no XML parsing);
+# `load_delay` falls back to XLSX_URL when it isn't published
+PARQUET_URL: str = os.getenv(
+    "GETAROUND_DELAY_PARQUET_URL",
+    XLSX_URL.replace(".xlsx", ".parquet")
+)
+
+# On-disk prediction cache: outlives the process (st.cache_data doesn't),
+# so a restarted app answers already-seen payloads without the network
+PREDICT_CACHE_DIR: str = os.getenv(
+    "GETAROUND_PREDICT_CACHE_DIR",
+    "/tmp/predict_cache"
+)
+
 CSV_URL: str = os.getenv(
     "GETAROUND_PRICING_CSV_URL",
     "https://huggingface.co/datasets/flodussart/getaround_pricing_project/resolve/main/get_around_pricing_project.csv"
@@ -25,20 +59,205 @@ API_URL: str = os.getenv(
 )
 
 
-# Data loading (cached)
-@st.cache_data(show_spinner=False)
+# Data loading (cached as shared resources: the same frame object on every
+# rerun, without cache_data's copy-on-read; pages only read from them)
+@st.cache_resource(show_spinner=False)
 def load_pricing() -> pd.DataFrame:
-    """Load the pricing dataset used across the Streamlit app."""
-    return pd.read_csv(CSV_URL)
+    """Load the pricing dataset used across the Streamlit app.
+
+    `has_getaround_connect` is normalized once here to a plain NumPy bool
+    (missing → False), so scope filters and means skip any per-render cast.
+    """
+    # Multithreaded Arrow parser; same NumPy-backed dtypes as the C engine
+    df = pd.read_csv(CSV_URL, engine="pyarrow")
+    # Arrow leaves header-less columns (the leading index) named "";
+    # restore the C engine's "Unnamed: <i>" names
+    df.columns = [
+        name if name != "" else f"Unnamed: {i}"
+        for i, name in enumerate(df.columns)
+    ]
+    if COL_HAS_CONNECT in df.columns:
+        df[COL_HAS_CONNECT] = (
+            df[COL_HAS_CONNECT].astype("boolean").fillna(False).astype(bool)
+        )
+    return df
 
 
-@st.cache_data(show_spinner=False)
+@st.cache_resource(show_spinner=False)
 def load_delay() -> pd.DataFrame:
-    """Load the rental delay dataset used for operational analyses."""
-    return pd.read_excel(XLSX_URL)
+    """Load the rental delay dataset used for operational analyses.
+
+    Dtypes are normalized once here rather than on every render:
+    - `checkin_type` / `state` as categoricals (masks compare int codes)
+    - delay / gap minutes as float32 (whole minutes, exact in float32)
+    - `delay_clipped`: delay clipped to [CLIP_MIN, CLIP_MAX], as float32
+    """
+    try:
+        df = pd.read_parquet(PARQUET_URL)
+    except Exception:
+        # Mirror missing or unreachable: parse the original workbook
+        df = pd.read_excel(XLSX_URL)
+    for col in (COL_CHECKIN, COL_STATE):
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    for col in (COL_DELAY_AT_CHECKOUT, COL_GAP):
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float32")
+    if COL_DELAY_AT_CHECKOUT in df.columns:
+        df["delay_clipped"] = df[COL_DELAY_AT_CHECKOUT].clip(CLIP_MIN, CLIP_MAX)
+    return df
+
+
+@st.cache_resource(show_spinner=False, max_entries=6)
+def load_scoped(scope: str) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Delay and pricing frames filtered to `scope` (see `apply_scope`).
+
+    Keyed on the scope string alone: the frames come from the cached loaders
+    above, so no DataFrame is hashed to look the result up.
+    Shared like them: callers only read the returned frames.
+    """
+    return apply_scope(load_delay(), load_pricing(), scope)
+
+
+# Column order of the legacy `input` matrix (training-time feature order)
+FEATURE_ORDER: tuple[str, ...] = (
+    "mileage",
+    "engine_power",
+    "model_key",
+    "fuel_grouped",
+    "paint_color",
+    "car_type",
+    "private_parking_available",
+    "has_gps",
+    "has_air_conditioning",
+    "automatic_car",
+    "has_getaround_connect",
+    "has_speed_regulator",
+    "winter_tires"
+)
+# Row dict → values in FEATURE_ORDER (shared with the prediction page)
+row_values = itemgetter(*FEATURE_ORDER)
 
 
 # API helpers
+# One shared HTTP/2 client for every API call: keep-alive connections,
+# multiplexed streams and TLS session reuse across reruns and predictions
+_CLIENT = httpx.Client(
+    http2=True,
+    timeout=20,
+    limits=httpx.Limits(max_connections=16, max_keepalive_connections=8),
+)
+
+# Separate connect / read budgets: an unreachable host fails in 2 s
+# instead of eating the whole timeout before any byte is read
+_INFO_TIMEOUT = httpx.Timeout(5.0, connect=2.0)
+_PREDICT_TIMEOUT = httpx.Timeout(15.0, connect=2.0)
+
+# Transient failures worth retrying (HF Space cold starts, rate limiting)
+_RETRY_STATUS = frozenset({429, 500, 502, 503, 504})
+
+
+def _retry(
+    call: Callable[[], httpx.Response],
+    *,
+    retries: int = 3,
+    base: float = 1.0,
+    cap: float = 30.0,
+) -> httpx.Response:
+    """Run `call` and `raise_for_status()`, retrying transient errors.
+
+    Retries transport errors (connect/read failures, timeouts) and 429/5xx
+    with capped exponential backoff + jitter; anything else (e.g. 422) is
+    raised immediately, as is the last error once `retries` is exhausted.
+    """
+    for attempt in range(retries + 1):
+        try:
+            resp = call()
+            resp.raise_for_status()
+            return resp
+        except httpx.TransportError:
+            if attempt == retries:
+                raise
+        except httpx.HTTPStatusError as exc:
+            if exc.response.status_code not in _RETRY_STATUS or attempt == retries:
+                raise
+        time.sleep(min(cap, base * 2**attempt * (1 + random.random() * 0.5)))
+    raise AssertionError("unreachable")
+
+
+class ApiUnavailable(RuntimeError):
+    """Raised without calling the API while the circuit breaker is open."""
+
+
+# In-process circuit breaker: after _BREAKER_FAILS consecutive transient
+# failures, skip the API for _BREAKER_COOLDOWN seconds (a cold Space would
+# otherwise cost a full timeout per call); after the cool-down a single
+# caller runs a half-open probe (no retries) while the others keep failing
+# fast, and the probe closes it on success or re-opens it on failure
+_BREAKER: dict[str, Any] = {"fails": 0, "opened_at": 0.0, "probing": False}
+_BREAKER_FAILS = 3
+_BREAKER_COOLDOWN = 30.0
+# Session threads and the prefetch pool share _BREAKER
+_BREAKER_LOCK = threading.Lock()
+
+
+def _call_api(
+    call: Callable[[], httpx.Response], *, retries: int = 3
+) -> httpx.Response:
+    """`_retry(call)` behind the circuit breaker (raises ApiUnavailable when open)."""
+    probe = False
+    with _BREAKER_LOCK:
+        if _BREAKER["fails"] >= _BREAKER_FAILS:
+            if (
+                _BREAKER["probing"]
+                or time.monotonic() - _BREAKER["opened_at"] < _BREAKER_COOLDOWN
+            ):
+                raise ApiUnavailable(
+                    "API unreachable recently; retrying after cool-down."
+                )
+            _BREAKER["probing"] = probe = True
+
+    api_up: Optional[bool] = None
+    try:
+        resp = _retry(call, retries=0 if probe else retries)
+        api_up = True
+    except httpx.HTTPStatusError as exc:
+        # Only transient statuses count; a 422 means the API is up
+        api_up = exc.response.status_code not in _RETRY_STATUS
+        raise
+    except httpx.TransportError:
+        api_up = False
+        raise
+    finally:
+        _settle(api_up, probe)
+    return resp
+
+
+def _settle(api_up: Optional[bool], probe: bool) -> None:
+    """Record a call's outcome (None: unknown error, leaves the count as is)."""
+    with _BREAKER_LOCK:
+        if probe:
+            _BREAKER["probing"] = False
+        if api_up:
+            _BREAKER["fails"] = 0
+        elif api_up is False:
+            _BREAKER["fails"] += 1
+            _BREAKER["opened_at"] = time.monotonic()
+
+
+def _json_body(obj: Any) -> bytes:
+    """Encode a request body once with orjson."""
+    return orjson.dumps(obj)
+
+
+def _json_response(resp: httpx.Response) -> dict[str, Any]:
+    """Decode a JSON response straight from its bytes (empty body → {})."""
+    if not resp.content:
+        return {}
+    data = orjson.loads(resp.content)
+    return data or {}
+
+
 def _api_url(path: str) -> str:
     """Join API_URL and a path like '/predict' without duplicating slashes."""
     base = API_URL.rstrip("/")
@@ -46,65 +265,151 @@ def _api_url(path: str) -> str:
     return f"{base}{suffix}"
 
 
-@st.cache_data(ttl=3600, show_spinner=False)
 def fetch_api_info() -> dict[str, Optional[Any]]:
-    """Fetch model metadata from the API root."""
-    url = _api_url("/")
+    """Fetch model metadata from the API root.
+
+    `model_id` is the bundle's MLflow `model_uuid` (else its `run_id`): unlike
+    `model_path`, it changes with every deployed model.
+    """
     try:
-        resp = requests.get(url, timeout=10)
-        resp.raise_for_status()
-        data: dict[str, Any] = resp.json() or {}
-        return {
-            "features": data.get("features"),
-            "model_path": data.get("model_path")
-        }
+        return _fetch_api_info_cached()
     except Exception:
-        # Non-blocking for the UI: return a minimal fallback.
-        return {"features": None, "model_path": None}
+        # Non-blocking for the UI: return a minimal fallback (not cached,
+        # so the next rerun asks again once the API is back)
+        return {"features": None, "model_path": None, "model_id": None}
 
 
-def predict_rows(rows: list[dict[str, Any]]) -> list[float]:
+@st.cache_data(ttl=3600, show_spinner=False)
+def _fetch_api_info_cached() -> dict[str, Optional[Any]]:
+    """`fetch_api_info` body; raises on failure so errors are never cached."""
+    # One retry (backoff <= 1.5 s) rides out a 503 while the Space wakes
+    # up; worst case ~16 s instead of _retry's default ~38 s
+    resp = _call_api(
+        lambda: _CLIENT.get(_api_url("/"), timeout=_INFO_TIMEOUT), retries=1
+    )
+    data: dict[str, Any] = _json_response(resp)
+    return {
+        "features": data.get("features"),
+        "model_path": data.get("model_path"),
+        "model_id": data.get("model_uuid") or data.get("run_id")
+    }
+
+
+def predict_rows(
+    rows: list[dict[str, Any]], model_id: Optional[str] = None
+) -> list[float]:
     """Call POST /predict using the preferred 'rows' schema with legacy fallback.
 
     This function first tries the modern payload: {"rows": [...]}. If the API
     rejects it with a 422 (validation error), it falls back to the legacy
     matrix payload: {"input": [[...], ...]}.
+
+    Raises ApiUnavailable, without any HTTP call, while the circuit breaker
+    is open after repeated transient failures.
+
+    Results are cached per payload and `model_id` (from `fetch_api_info`):
+    1 h in memory and, when `model_id` is known, 24 h on disk under
+    PREDICT_CACHE_DIR. A new model bundle has a new id, so its predictions
+    never come from the old one's entries. Without an id
+    (API metadata unavailable), only the in-memory cache is used, and it
+    cannot tell a redeployed model apart within its 1 h TTL.
     """
+    rows_json = json.dumps(rows, sort_keys=True, separators=(",", ":"))
+    return list(_predict_rows_cached(rows_json, model_id))
+
+
+@st.cache_data(ttl=3600, max_entries=1024, show_spinner=False)
+def _predict_rows_cached(rows_json: str, model_id: Optional[str]) -> list[float]:
+    """Uncached `predict_rows` body, keyed on the serialized payload."""
+    # Disk entries outlive deployments: only trust them under a real model id
+    disk = _disk_cache() if model_id is not None else None
+    key = hashlib.blake2b(f"{model_id}\n{rows_json}".encode()).digest()
+    if disk is not None:
+        try:
+            cached = disk.get(key)
+        except Exception:
+            cached = None
+        if cached is not None:
+            return cached
+
+    preds = _post_predict(json.loads(rows_json))
+    if disk is not None:
+        try:
+            disk.set(key, preds, expire=_DISK_TTL)
+        except Exception:
+            pass  # best effort: the in-memory cache still has it
+    return preds
+
+
+_DISK_TTL = 86400
+_DISK_SIZE_LIMIT = 64 * 1024 * 1024
+_DISK_LOCK = threading.Lock()
+_disk: Optional[diskcache.Cache] = None
+
+
+def _disk_cache() -> Optional[diskcache.Cache]:
+    """Open the on-disk prediction cache on first use (None if unavailable)."""
+    global _disk
+    if _disk is None:
+        with _DISK_LOCK:
+            if _disk is None:
+                try:
+                    _disk = diskcache.Cache(
+                        PREDICT_CACHE_DIR, size_limit=_DISK_SIZE_LIMIT
+                    )
+                except Exception:
+                    return None
+    return _disk
+
+
+def _post_predict(rows: list[dict[str, Any]]) -> list[float]:
+    """POST rows to /predict ('rows' schema, legacy 'input' fallback on 422)."""
     url = _api_url("/predict")
     headers = {"Content-Type": "application/json"}
 
-    # Preferred modern schema
+    # Preferred modern schema (body encoded once, reused by retries)
+    body = _json_body({"rows": rows})
     try:
-        resp = requests.post(url, json={"rows": rows}, headers=headers, timeout=20)
-        resp.raise_for_status()
-        data: dict[str, Any] = resp.json() or {}
+        resp = _call_api(
+            lambda: _CLIENT.post(
+                url, content=body, headers=headers, timeout=_PREDICT_TIMEOUT
+            )
+        )
+        data: dict[str, Any] = _json_response(resp)
         preds = data.get("prediction") or data.get("predictions")
         if not isinstance(preds, list):
             raise ValueError("Unexpected API response: missing 'prediction' list.")
-        return [float(x) for x in preds]
+        return np.asarray(preds, dtype=np.float64).tolist()
 
-    except requests.HTTPError as exc:
+    except httpx.HTTPStatusError as exc:
         # Fallback if API rejects 'rows' with a validation error (commonly 422)
-        if exc.response is not None and exc.response.status_code == 422:
-            matrix = [list(r.values()) for r in rows]
-            resp = requests.post(
-                url, json={"input": matrix}, headers=headers, timeout=20
+        if exc.response.status_code == 422:
+            body = _json_body({"input": [list(row_values(r)) for r in rows]})
+            resp = _call_api(
+                lambda: _CLIENT.post(
+                    url, content=body, headers=headers, timeout=_PREDICT_TIMEOUT
+                )
             )
-            resp.raise_for_status()
-            data = resp.json() or {}
+            data = _json_response(resp)
             preds = data.get("prediction") or data.get("predictions")
             if not isinstance(preds, list):
                 raise ValueError("Unexpected API response in fallback mode.")
-            return [float(x) for x in preds]
+            return np.asarray(preds, dtype=np.float64).tolist()
         raise
 
 
 __all__ = [
     "XLSX_URL",
+    "PARQUET_URL",
+    "PREDICT_CACHE_DIR",
     "CSV_URL",
     "API_URL",
+    "FEATURE_ORDER",
+    "row_values",
+    "ApiUnavailable",
     "load_pricing",
     "load_delay",
+    "load_scoped",
     "fetch_api_info",
     "predict_rows"
 ]
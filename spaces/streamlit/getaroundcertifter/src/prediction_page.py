@@ -1,18 +1,20 @@
 # prediction_page.py
 from __future__ import annotations
 
-import json
 import time
 from typing import Any
 
+import orjson
 import plotly.io as pio
 import streamlit as st
+
 from common import read_logo, get_plotly_theme
-from loaders import fetch_api_info, predict_rows
+from loaders import ApiUnavailable, fetch_api_info, predict_rows, row_values
 
 # Plotly theme configuration
-pio.templates["getaround"] = get_plotly_theme()
-pio.templates.default = "getaround"
+if "getaround" not in pio.templates:
+    pio.templates["getaround"] = get_plotly_theme()
+    pio.templates.default = "getaround"
 
 # Allowed values (must match API-side validation)
 MODEL_KEYS: list[str] = [
@@ -132,11 +134,33 @@ CAR_TYPE_LABELS = {
     "van": "Van / Monospace"
 }
 
+# Choices sorted by displayed label, plus default indices (computed once at import)
+SORTED_MODEL_KEYS: list[str] = sorted(
+    MODEL_KEYS,
+    key=lambda x: MODEL_KEY_LABELS.get(x, x).lower()
+)
+SORTED_FUEL: list[str] = sorted(
+    FUEL,
+    key=lambda x: FUEL_LABELS.get(x, x).lower()
+)
+SORTED_PAINT: list[str] = sorted(
+    PAINT,
+    key=lambda x: PAINT_LABELS.get(x, x).lower()
+)
+SORTED_CAR_TYPES: list[str] = sorted(
+    CAR_TYPES,
+    key=lambda x: CAR_TYPE_LABELS.get(x, x).lower()
+)
+
+_IDX_MODEL_KEY = SORTED_MODEL_KEYS.index("renault")
+_IDX_FUEL = SORTED_FUEL.index("diesel")
+_IDX_PAINT = SORTED_PAINT.index("black")
+_IDX_CAR_TYPE = SORTED_CAR_TYPES.index("hatchback")
+
 
 # Helper functions
-@st.cache_data(show_spinner=False)
 def _safe_fetch_api_info() -> dict[str, Any]:
-    """Safely fetch model metadata from API with caching and error handling."""
+    """Fetch model metadata (cached by `fetch_api_info`) with error handling."""
     try:
         return fetch_api_info() or {}
     except Exception as exc:  
@@ -145,6 +169,29 @@ def _safe_fetch_api_info() -> dict[str, Any]:
         return {}
 
 
+def _dumps(obj: Any, *, pretty: bool = False) -> str:
+    """Serialize a payload for display with orjson."""
+    option = orjson.OPT_INDENT_2 if pretty else 0
+    return orjson.dumps(obj, option=option).decode()
+
+
+def _api_status_block(info: dict[str, Any]) -> None:
+    """Render the model / features / status captions and the docs link."""
+    features = info.get("features") or []
+    st.caption(f"Modèle : `{info.get('model_path', 'N/A')}`")
+    st.caption(f"Features attendues : {features if features else 'N/A'}")
+
+    ok = bool(info) and (
+        info.get("features") is not None or info.get("model_path") is not None
+    )
+    st.caption(f"Statut API : {'🟢 Connectée' if ok else '🔴 Indisponible'}")
+
+    st.link_button(
+        "📘 Ouvrir la documentation API",
+        "https://flodussart-getaround-delay-pricing-api.hf.space/docs"
+    )
+
+
 def _usd(val: float) -> str:
     """Format a float as a USD string (e.g., 1234.5 → '$1,234.50')."""
     return f"${val:,.2f}"
@@ -171,39 +218,9 @@ def page_prediction() -> None:
 
     # API metadata
     info: dict[str, Any] = _safe_fetch_api_info()
-    features = info.get("features") or []
-    st.caption(f"Modèle : `{info.get('model_path', 'N/A')}`")
-    st.caption(f"Features attendues : {features if features else 'N/A'}")
-
-    ok = bool(info) and (
-        info.get("features") is not None or info.get("model_path") is not None
-    )
-    st.caption(f"Statut API : {'🟢 Connectée' if ok else '🔴 Indisponible'}")
-
-    st.link_button(
-        "📘 Ouvrir la documentation API",
-        "https://flodussart-getaround-delay-pricing-api.hf.space/docs"
-    )
+    _api_status_block(info)
     st.divider()
 
-    # Prepare sorted choices for UI
-    sorted_model_keys = sorted(
-        MODEL_KEYS,
-        key=lambda x: MODEL_KEY_LABELS.get(x, x).lower()
-    )
-    sorted_fuel = sorted(
-        FUEL,
-        key=lambda x: FUEL_LABELS.get(x, x).lower()
-    )
-    sorted_paint = sorted(
-        PAINT,
-        key=lambda x: PAINT_LABELS.get(x, x).lower()
-    )
-    sorted_car_types = sorted(
-        CAR_TYPES,
-        key=lambda x: CAR_TYPE_LABELS.get(x, x).lower()
-    )
-
     # Single prediction form
     st.subheader("Prédiction unitaire")
 
@@ -226,27 +243,27 @@ def page_prediction() -> None:
         )
         model_key: str = c3.selectbox(
             "Marque du véhicule",
-            sorted_model_keys,
-            index=sorted_model_keys.index("renault"),
+            SORTED_MODEL_KEYS,
+            index=_IDX_MODEL_KEY,
             format_func=lambda x: MODEL_KEY_LABELS.get(x, x.title())
         )
 
         fuel_grouped: str = c1.selectbox(
             "Carburant",
-            sorted_fuel,
-            index=sorted_fuel.index("diesel"),
+            SORTED_FUEL,
+            index=_IDX_FUEL,
             format_func=lambda x: FUEL_LABELS.get(x, x)
         )
         paint_color: str = c2.selectbox(
             "Couleur de la carrosserie",
-            sorted_paint,
-            index=sorted_paint.index("black"),
+            SORTED_PAINT,
+            index=_IDX_PAINT,
             format_func=lambda x: PAINT_LABELS.get(x, x)
         )
         car_type: str = c3.selectbox(
             "Type de véhicule",
-            sorted_car_types,
-            index=sorted_car_types.index("hatchback"),
+            SORTED_CAR_TYPES,
+            index=_IDX_CAR_TYPE,
             format_func=lambda x: CAR_TYPE_LABELS.get(x, x)
         )
 
@@ -290,7 +307,7 @@ def page_prediction() -> None:
         # Perform API call
         try:
             t0 = time.perf_counter()
-            pred = predict_rows([row])[0]
+            pred = predict_rows([row], model_id=info.get("model_id"))[0]
             latency_ms = (time.perf_counter() - t0) * 1000
 
             m1, m2 = st.columns(2)
@@ -298,6 +315,11 @@ def page_prediction() -> None:
             m2.metric("Latence API (ms)", f"{latency_ms:.0f}")
 
             st.success(f"Prix prédit : {_usd(pred)}")
+        except ApiUnavailable:
+            st.warning(
+                "API momentanément indisponible (démarrage du Space ?) — "
+                "réessayez dans quelques secondes."
+            )
         except Exception as exc:  # pragma: no cover
             st.error("Erreur d’appel API.")
             st.exception(exc)
@@ -307,28 +329,26 @@ def page_prediction() -> None:
         with st.expander(
             "Payload JSON envoyé (format rows — utilisé par le dashboard)"
         ):
-            st.code(json.dumps(payload_rows, indent=2), language="json")
+            st.code(_dumps(payload_rows, pretty=True), language="json")
 
         with st.expander("Exemple curl (format rows)"):
             st.code(
                 "curl -s -H 'Content-Type: application/json' "
                 "-X POST https://flodussart-getaround-delay-pricing-api.hf.space/predict "
-                f"-d '{json.dumps(payload_rows)}'",
+                f"-d '{_dumps(payload_rows)}'",
                 language="bash"
             )
 
-        # Alternative payload ("input" format)
-        feature_order = list(row.keys())
-        ordered_values = [row[name] for name in feature_order]
-        payload_input = {"input": [ordered_values]}
+        # Alternative payload ("input" format, columns in FEATURE_ORDER)
+        payload_input = {"input": [list(row_values(row))]}
 
         with st.expander("Payload alternatif (format input : [[...]])"):
-            st.code(json.dumps(payload_input, indent=2), language="json")
+            st.code(_dumps(payload_input, pretty=True), language="json")
 
         with st.expander("Exemple curl (format input)"):
             st.code(
                 "curl -s -H 'Content-Type: application/json' "
                 "-X POST https://flodussart-getaround-delay-pricing-api.hf.space/predict "
-                f"-d '{json.dumps(payload_input)}'",
+                f"-d '{_dumps(payload_input)}'",
                 language="bash"
             )
@@ -1,21 +1,91 @@
 # streamlit_app.py
 from __future__ import annotations
 
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
 import streamlit as st
-from loaders import load_pricing, load_delay
+from streamlit.runtime.scriptrunner import (
+    ScriptRunContext,
+    add_script_run_ctx,
+    get_script_run_ctx,
+)
+
+from loaders import fetch_api_info, load_pricing, load_delay
 from home_page import main_page
-from analysis_page import page_analyse_retards
-from prediction_page import page_prediction
+
+# analysis_page / prediction_page are imported lazily in `router()`: opening
+# the home page doesn't pay for their imports (Python caches them afterwards)
 
 # Page config (must be called once, and before any Streamlit UI command)
 st.set_page_config(page_title="GetAround Project", page_icon="🚗", layout="wide")
 
 
+class _PrefetchState:
+    """Process-wide prefetch pool, the dataset loads and the API ping."""
+
+    def __init__(self) -> None:
+        self.pool = ThreadPoolExecutor(max_workers=3, thread_name_prefix="prefetch")
+        self.lock = threading.Lock()
+        self.datasets: Optional[tuple[Future, Future]] = None
+        self.ping: Optional[Future] = None
+
+
+# This script re-runs from the top on every interaction: the pool lives in
+# a cached resource so every rerun and session reuses the same threads
+@st.cache_resource(show_spinner=False)
+def _prefetch_state() -> _PrefetchState:
+    return _PrefetchState()
+
+
+def _in_ctx(ctx: Optional[ScriptRunContext], fn: Callable[[], Any]) -> Any:
+    """Run `fn` on a pool thread bound to the submitting run's context.
+
+    The thread's previous context is restored afterwards, so an idle pool
+    thread never holds on to a finished run (and its session).
+    """
+    thread = threading.current_thread()
+    previous = get_script_run_ctx(suppress_warning=True)
+    add_script_run_ctx(thread, ctx)
+    try:
+        return fn()
+    finally:
+        add_script_run_ctx(thread, previous)
+
+
+def _prefetch() -> None:
+    """Warm pricing, delays and API metadata concurrently (I/O-bound).
+
+    Only the two datasets are waited for (pages read them back from the
+    loaders' cache). They are submitted once per process, and again only
+    if a load failed; later reruns just check the finished futures.
+    The API ping keeps warming `fetch_api_info`'s cache in the background
+    for the prediction page, and is only submitted when no earlier ping
+    is still pending (a down API would otherwise pile up one blocked
+    thread per rerun).
+    """
+    state = _prefetch_state()
+    ctx = get_script_run_ctx()
+    with state.lock:
+        if state.datasets is None or any(
+            f.done() and f.exception() is not None for f in state.datasets
+        ):
+            state.datasets = (
+                state.pool.submit(_in_ctx, ctx, load_pricing),
+                state.pool.submit(_in_ctx, ctx, load_delay),
+            )
+        datasets = state.datasets
+        if state.ping is None or state.ping.done():
+            state.ping = state.pool.submit(_in_ctx, ctx, fetch_api_info)
+    for f in datasets:
+        f.result()
+
+
 def router() -> None:
     """Main router: load data once, handle sidebar navigation, and dispatch pages."""
-    # Load shared datasets once (cached in `loaders.py`)
-    dataset_pricing = load_pricing()
-    df_delay = load_delay()
+    # Load shared datasets once (cached in `loaders.py`), in parallel
+    _prefetch()
 
     # Sidebar navigation
     st.sidebar.header("Navigation")
@@ -26,13 +96,17 @@ def router() -> None:
     )
 
     if page == "Accueil":
-        main_page(dataset_pricing, df_delay)
+        main_page()
 
     elif page == "Analyse des retards":
-        page_analyse_retards(df_delay, dataset_pricing)
+        from analysis_page import page_analyse_retards
+
+        page_analyse_retards()
 
     elif page == "Prédiction des prix":
         try:
+            from prediction_page import page_prediction
+
             page_prediction()
         except Exception as exc:  
             st.error("Impossible de charger la page de prédiction.")
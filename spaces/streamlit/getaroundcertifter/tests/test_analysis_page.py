@@ -0,0 +1,76 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("streamlit")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import analysis_page  # noqa: E402
+from common import (  # noqa: E402
+    COL_CHECKIN,
+    COL_PREV_ID,
+    COL_RENTAL_ID,
+    COL_STATE,
+)
+
+
+def old_next_rental_pairs(df_scoped):
+    """PART 2 pairing as the page computed it with dict lookups."""
+    ended = df_scoped[df_scoped[COL_STATE] == "ended"].copy()
+    ended = ended[ended[COL_CHECKIN].isin(["mobile", "connect"])].copy()
+    next_map = (
+        ended.dropna(subset=[COL_PREV_ID]).set_index(COL_PREV_ID)[COL_RENTAL_ID].to_dict()
+    )
+    ended["next_rental_id"] = ended[COL_RENTAL_ID].map(next_map)
+    delay_map = ended.set_index(COL_RENTAL_ID)["delay_clipped"].to_dict()
+    has_next = ended.dropna(subset=["next_rental_id"]).copy()
+    has_next["next_rental_id"] = pd.to_numeric(
+        has_next["next_rental_id"], errors="coerce"
+    ).astype("Int64")
+    has_next["next_delay"] = has_next["next_rental_id"].map(delay_map)
+    has_next = has_next.dropna(subset=["delay_clipped", "next_delay"]).copy()
+    has_next = has_next[has_next["next_delay"] >= 0].copy()
+    has_next["next_delay"] = has_next["next_delay"].clip(0, 1000)
+    return has_next
+
+
+@pytest.fixture
+def df_scoped():
+    # 2 and 8 both follow 1 (duplicate previous_ended_rental_id); 4 follows a
+    # canceled rental; 2's successor (3) has a negative delay, 3's (12) one
+    # past the clip bound; 7 (successor of 6) and 10 have NaN delays
+    return pd.DataFrame({
+        COL_RENTAL_ID: [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13],
+        COL_PREV_ID: [np.nan, 1, 2, 5, np.nan, np.nan, 6, 1, 7, np.nan, 10, 3, 11],
+        COL_STATE: pd.Categorical(["ended"] * 4 + ["canceled"] + ["ended"] * 8),
+        COL_CHECKIN: pd.Categorical(
+            ["mobile", "connect", "mobile", "mobile", "mobile", "connect", "mobile",
+             "connect", "mobile", "connect", "mobile", "mobile", "connect"]
+        ),
+        "delay_clipped": np.asarray(
+            [30, 0, -20, 15, 5, 60, np.nan, 45, -3, np.nan, 12, 1500, 0],
+            dtype=np.float32,
+        ),
+    })
+
+
+def test_pairs_match_the_dict_lookup(df_scoped, monkeypatch):
+    monkeypatch.setattr(
+        analysis_page, "load_scoped", lambda scope: (df_scoped, None)
+    )
+    new = analysis_page._next_rental_pairs.__wrapped__("Toutes les voitures")
+    old = old_next_rental_pairs(df_scoped)
+
+    cols = [COL_RENTAL_ID, "delay_clipped", COL_CHECKIN, "next_delay"]
+    pd.testing.assert_frame_equal(
+        new[cols].reset_index(drop=True),
+        old[cols].reset_index(drop=True),
+        check_dtype=False,
+        check_categorical=False,
+    )
+    # Rental 1 is paired with its last successor (8), as the dict kept it
+    assert new[COL_RENTAL_ID].tolist() == [1, 3, 11]
+    assert new["next_delay"].tolist() == [45, 1000, 0]
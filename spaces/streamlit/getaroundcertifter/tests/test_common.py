@@ -0,0 +1,152 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("streamlit")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from common import (  # noqa: E402
+    COL_CHECKIN,
+    COL_DELAY_AT_CHECKOUT,
+    COL_STATE,
+    ORDER_STATUS,
+    build_curves_masked_solved,
+    checkin_pct,
+    checkout_counts,
+    pick_value,
+    state_pct,
+)
+
+
+# Reference implementations: the pandas versions these helpers replaced
+def old_build_curves(df_gap):
+    rows_loss, rows_solved = [], []
+    for t in np.arange(0, 181, 1, dtype=int):
+        for ci in ("mobile", "connect"):
+            sub = df_gap[df_gap[COL_CHECKIN] == ci]
+            denom_loss = len(sub)
+            denom_solved = int(sub["was_conflict"].sum())
+            masked = int((sub["gap"] < t).sum())
+            solved = int(((sub["gap"] < t) & sub["was_conflict"]).sum())
+            rows_loss.append({
+                "Seuil (min)": t,
+                "variable": f"Masquées {ci} (%)",
+                "value": (masked / denom_loss * 100) if denom_loss else 0.0,
+            })
+            rows_solved.append({
+                "Seuil (min)": t,
+                "variable": f"Évités {ci} (%)",
+                "value": (solved / denom_solved * 100) if denom_solved else 0.0,
+            })
+    return pd.DataFrame(rows_loss), pd.DataFrame(rows_solved)
+
+
+def old_pick_value(df_long, label, t):
+    sub = df_long[df_long["variable"] == label].sort_values("Seuil (min)")
+    if sub.empty:
+        return 0.0
+    if t in set(sub["Seuil (min)"]):
+        return float(sub.loc[sub["Seuil (min)"] == t, "value"].iloc[0])
+    lo = sub[sub["Seuil (min)"] <= t].tail(1)
+    hi = sub[sub["Seuil (min)"] >= t].head(1)
+    if lo.empty:
+        return float(hi["value"].iloc[0])
+    if hi.empty:
+        return float(lo["value"].iloc[0])
+    x0, y0 = int(lo["Seuil (min)"].iloc[0]), float(lo["value"].iloc[0])
+    x1, y1 = int(hi["Seuil (min)"].iloc[0]), float(hi["value"].iloc[0])
+    w = (t - x0) / (x1 - x0) if x1 != x0 else 0.0
+    return y0 + w * (y1 - y0)
+
+
+def old_checkout_counts(df_delay):
+    df = df_delay.loc[
+        df_delay[COL_DELAY_AT_CHECKOUT].notna(), [COL_CHECKIN, COL_DELAY_AT_CHECKOUT]
+    ].copy()
+    df["checkout_status"] = pd.cut(
+        df[COL_DELAY_AT_CHECKOUT],
+        bins=[-1e9, -1e-9, 1e-9, 1e9],
+        labels=ORDER_STATUS,
+        include_lowest=True
+    )
+    counts = (
+        df.groupby([COL_CHECKIN, "checkout_status"], observed=True)
+        .size()
+        .reset_index(name="n")
+    )
+    counts["total_type"] = (
+        counts.groupby(COL_CHECKIN, observed=False)["n"].transform("sum")
+    )
+    counts["pct"] = counts["n"] / counts["total_type"] * 100
+    return counts
+
+
+@pytest.fixture
+def df_gap():
+    # Gaps on exact thresholds (0, 1, 60, 180), past the grid, and NaN
+    gap = [0, 1, 1, 60, 60, 179, 180, 181, np.nan, 30, 0, np.nan, 90, 500]
+    delay = [5, 0, 2, 61, 10, 200, 180, 300, 40, 31, 1, 0, 0, 600]
+    checkin = ["mobile"] * 9 + ["connect"] * 5
+    return pd.DataFrame({
+        COL_CHECKIN: pd.Categorical(checkin),
+        "gap": np.asarray(gap, dtype=np.float32),
+        "was_conflict": np.asarray(delay) > np.asarray(gap),
+    })
+
+
+def test_curves_match_the_pandas_loop(df_gap):
+    loss, solved, _ = build_curves_masked_solved(df_gap)
+    old_loss, old_solved = old_build_curves(df_gap)
+    pd.testing.assert_frame_equal(loss, old_loss, check_dtype=False)
+    pd.testing.assert_frame_equal(solved, old_solved, check_dtype=False)
+
+
+def test_curves_for_a_missing_checkin_type(df_gap):
+    mobile_only = df_gap[df_gap[COL_CHECKIN].eq("mobile")].astype(
+        {COL_CHECKIN: str}
+    )
+    loss, solved, curves = build_curves_masked_solved(mobile_only)
+    old_loss, old_solved = old_build_curves(mobile_only)
+    pd.testing.assert_frame_equal(loss, old_loss, check_dtype=False)
+    pd.testing.assert_frame_equal(solved, old_solved, check_dtype=False)
+    assert not curves["Masquées connect (%)"].any()
+
+
+@pytest.mark.parametrize("t", [0, 1, 59, 60, 60.5, 179.25, 180, 250, -5])
+@pytest.mark.parametrize(
+    "label", ["Masquées mobile (%)", "Évités connect (%)", "Inconnu"]
+)
+def test_pick_value_matches_the_long_lookup(df_gap, label, t):
+    loss, solved, curves = build_curves_masked_solved(df_gap)
+    df_long = pd.concat([loss, solved], ignore_index=True)
+    assert pick_value(curves, label, t) == pytest.approx(
+        old_pick_value(df_long, label, t)
+    )
+
+
+def test_checkout_counts_match_pd_cut():
+    delays = [-30, -1, 0, 0, 1, 15, np.nan, 120, -0.0, 0, np.nan, 2000, -5]
+    checkin = ["mobile"] * 8 + ["connect"] * 5
+    df = pd.DataFrame({
+        COL_CHECKIN: pd.Categorical(checkin),
+        COL_DELAY_AT_CHECKOUT: np.asarray(delays, dtype=np.float32),
+    })
+    new = checkout_counts(df).astype({COL_CHECKIN: str, "checkout_status": str})
+    old = old_checkout_counts(df).astype({COL_CHECKIN: str, "checkout_status": str})
+    pd.testing.assert_frame_equal(new, old, check_dtype=False)
+
+
+def test_share_pct_drops_unobserved_categories():
+    states = pd.Series(
+        pd.Categorical(["ended", "ended", None, "canceled"],
+                       categories=["canceled", "ended", "unknown"])
+    )
+    df = pd.DataFrame({COL_STATE: states, COL_CHECKIN: states})
+    for share in (state_pct(df), checkin_pct(df)):
+        label = share.columns[0]
+        assert share[label].tolist() == ["ended", "canceled"]
+        assert not isinstance(share[label].dtype, pd.CategoricalDtype)
+        assert share["Pourcentage"].tolist() == pytest.approx([200 / 3, 100 / 3])
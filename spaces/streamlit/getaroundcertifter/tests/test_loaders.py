@@ -0,0 +1,243 @@
+import sys
+from pathlib import Path
+
+import httpx
+import orjson
+import pytest
+
+pytest.importorskip("streamlit")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import loaders  # noqa: E402
+
+
+def _response(status, json=None):
+    """Response bound to a request, as `raise_for_status` needs."""
+    return httpx.Response(
+        status, json=json, request=httpx.Request("POST", "http://api/predict")
+    )
+
+
+class FakeClient:
+    """Stand-in for `_CLIENT`: replays `responses` and records request bodies."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.bodies = []
+
+    def post(self, url, *, content, headers, timeout):
+        self.bodies.append(orjson.loads(content))
+        outcome = self.responses.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+@pytest.fixture(autouse=True)
+def closed_breaker(monkeypatch):
+    """Every test starts with a fresh, closed circuit breaker."""
+    monkeypatch.setattr(
+        loaders, "_BREAKER", {"fails": 0, "opened_at": 0.0, "probing": False}
+    )
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record backoff delays instead of sleeping; jitter pinned to its max."""
+    delays = []
+    monkeypatch.setattr(loaders.time, "sleep", delays.append)
+    monkeypatch.setattr(loaders.random, "random", lambda: 1.0)
+    return delays
+
+
+def test_retry_backs_off_up_to_cap_then_reraises(sleeps):
+    calls = []
+
+    def call():
+        calls.append(1)
+        return _response(503)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        loaders._retry(call, retries=3, base=1.0, cap=2.0)
+    assert len(calls) == 4
+    assert sleeps == [1.5, 2.0, 2.0]
+
+
+def test_retry_transport_error_then_success(sleeps):
+    outcomes = [httpx.ConnectError("down"), _response(200, {"ok": True})]
+
+    def call():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert loaders._retry(call, retries=3).json() == {"ok": True}
+    assert sleeps == [1.5]
+
+
+def test_retry_does_not_retry_validation_errors(sleeps):
+    calls = []
+
+    def call():
+        calls.append(1)
+        return _response(422)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        loaders._retry(call, retries=3)
+    assert len(calls) == 1
+    assert sleeps == []
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake `time.monotonic`: advance it with `clock[0] += seconds`."""
+    now = [1000.0]
+    monkeypatch.setattr(loaders.time, "monotonic", lambda: now[0])
+    return now
+
+
+def _ping(client):
+    return loaders._call_api(
+        lambda: client.post("http://api/", content=b"{}", headers={}, timeout=1),
+        retries=0,
+    )
+
+
+def _open_breaker(clock):
+    client = FakeClient(*[httpx.ConnectError("down")] * loaders._BREAKER_FAILS)
+    for _ in range(loaders._BREAKER_FAILS):
+        with pytest.raises(httpx.ConnectError):
+            _ping(client)
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    _open_breaker(clock)
+    client = FakeClient()
+    with pytest.raises(loaders.ApiUnavailable):
+        _ping(client)
+    assert client.bodies == []
+
+    # Still open just before the cool-down ends
+    clock[0] += loaders._BREAKER_COOLDOWN - 1
+    with pytest.raises(loaders.ApiUnavailable):
+        _ping(client)
+
+
+def test_validation_errors_do_not_open_the_breaker(clock):
+    client = FakeClient(*[_response(422)] * (loaders._BREAKER_FAILS + 1))
+    for _ in range(loaders._BREAKER_FAILS + 1):
+        with pytest.raises(httpx.HTTPStatusError):
+            _ping(client)
+    assert loaders._BREAKER["fails"] == 0
+
+
+def test_successful_probe_closes_the_breaker(clock, sleeps):
+    _open_breaker(clock)
+    clock[0] += loaders._BREAKER_COOLDOWN
+    client = FakeClient(_response(200), _response(200))
+    loaders._call_api(
+        lambda: client.post("http://api/", content=b"{}", headers={}, timeout=1)
+    )
+    assert loaders._BREAKER == {"fails": 0, "opened_at": 1000.0, "probing": False}
+    _ping(client)
+    assert len(client.bodies) == 2
+
+
+def test_failed_probe_reopens_without_retrying(clock, sleeps):
+    _open_breaker(clock)
+    clock[0] += loaders._BREAKER_COOLDOWN
+    client = FakeClient(_response(503), _response(200))
+    with pytest.raises(httpx.HTTPStatusError):
+        loaders._call_api(
+            lambda: client.post("http://api/", content=b"{}", headers={}, timeout=1)
+        )
+    # The probe is a single attempt, whatever `retries` says
+    assert len(client.bodies) == 1
+    assert sleeps == []
+    assert loaders._BREAKER["opened_at"] == clock[0]
+    assert not loaders._BREAKER["probing"]
+    with pytest.raises(loaders.ApiUnavailable):
+        _ping(client)
+
+
+def test_only_one_probe_at_a_time(clock):
+    _open_breaker(clock)
+    clock[0] += loaders._BREAKER_COOLDOWN
+    client = FakeClient(_response(200))
+    concurrent = []
+
+    def probe():
+        # Another caller arrives while the probe is in flight
+        with pytest.raises(loaders.ApiUnavailable):
+            _ping(FakeClient())
+        concurrent.append(1)
+        return client.post("http://api/", content=b"{}", headers={}, timeout=1)
+
+    loaders._call_api(probe)
+    assert concurrent == [1]
+    assert loaders._BREAKER["fails"] == 0
+
+
+def test_legacy_fallback_sends_rows_in_feature_order(monkeypatch):
+    row = dict(zip(loaders.FEATURE_ORDER, range(len(loaders.FEATURE_ORDER))))
+    shuffled = dict(reversed(list(row.items())))
+    client = FakeClient(_response(422), _response(200, {"prediction": [42.0]}))
+    monkeypatch.setattr(loaders, "_CLIENT", client)
+
+    assert loaders._post_predict([shuffled]) == [42.0]
+    assert client.bodies[0] == {"rows": [shuffled]}
+    assert client.bodies[1] == {
+        "input": [[row[c] for c in loaders.FEATURE_ORDER]]
+    }
+
+
+class FakeDisk:
+    """Stand-in for the diskcache.Cache returned by `_disk_cache`."""
+
+    def __init__(self):
+        self.store = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def set(self, key, value, expire=None):
+        self.store[key] = value
+
+
+@pytest.fixture
+def posts(monkeypatch):
+    """Count `_post_predict` calls (one prediction per row)."""
+    calls = []
+
+    def post(rows):
+        calls.append(rows)
+        return [float(i) for i in range(len(rows))]
+
+    monkeypatch.setattr(loaders, "_post_predict", post)
+    return calls
+
+
+def test_disk_hit_skips_the_api(monkeypatch, posts):
+    disk = FakeDisk()
+    monkeypatch.setattr(loaders, "_disk_cache", lambda: disk)
+    predict = loaders._predict_rows_cached.__wrapped__
+
+    assert predict('[{"mileage":1}]', "model-a") == [0.0]
+    assert predict('[{"mileage":1}]', "model-a") == [0.0]
+    assert len(posts) == 1
+    # Another model id never reads the first model's entry
+    predict('[{"mileage":1}]', "model-b")
+    assert len(posts) == 2
+
+
+def test_no_model_id_bypasses_the_disk(monkeypatch, posts):
+    def no_disk():
+        raise AssertionError("disk cache opened without a model id")
+
+    monkeypatch.setattr(loaders, "_disk_cache", no_disk)
+    predict = loaders._predict_rows_cached.__wrapped__
+
+    predict('[{"mileage":1}]', None)
+    predict('[{"mileage":1}]', None)
+    assert len(posts) == 2